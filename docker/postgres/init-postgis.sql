@@ -27,8 +27,12 @@ CREATE TABLE IF NOT EXISTS public.aircraft_positions_history (
     flight      TEXT,
     observed_at TIMESTAMP NOT NULL DEFAULT now(),
     geom        geometry(Point, 4326),
-    data        JSONB
+    data        JSONB,
+    source      TEXT
 );
+-- existing databases (created before multi-receiver ingest)
+ALTER TABLE public.aircraft_positions_history
+    ADD COLUMN IF NOT EXISTS source TEXT;
 CREATE INDEX IF NOT EXISTS idx_aircraft_positions_history_hex
     ON public.aircraft_positions_history(hex);
 CREATE INDEX IF NOT EXISTS idx_aircraft_positions_history_observed_at
@@ -48,9 +52,17 @@ CREATE TABLE IF NOT EXISTS public.aircraft_live (
     lon       DOUBLE PRECISION,
     alt_baro  TEXT,
     track     DOUBLE PRECISION,
+    gs        DOUBLE PRECISION,
+    baro_rate DOUBLE PRECISION,
+    pos_seen  TIMESTAMP,          -- when lat/lon was received
     geom      geometry(Point, 4326),
     data      JSONB
 );
+-- existing databases (created before velocity columns / dead reckoning)
+ALTER TABLE public.aircraft_live
+    ADD COLUMN IF NOT EXISTS gs DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS baro_rate DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS pos_seen TIMESTAMP;
 CREATE INDEX IF NOT EXISTS idx_aircraft_live_last_seen
     ON public.aircraft_live(last_seen);
 CREATE INDEX IF NOT EXISTS idx_aircraft_live_geom
@@ -104,6 +116,78 @@ CREATE INDEX IF NOT EXISTS idx_aircraft_paths_history_end_time
 CREATE INDEX IF NOT EXISTS idx_aircraft_paths_history_geom
     ON public.aircraft_paths_history USING GIST(geom);
 
+-- ============================================================
+-- TABLE: receiver_coverage (polar grid around the receiver)
+-- Filled incrementally by the ingest worker from
+-- aircraft_positions_history (watermark in coverage_state).
+-- ============================================================
+CREATE TABLE IF NOT EXISTS public.receiver_coverage (
+    bearing_bin  INTEGER NOT NULL,
+    range_bin    INTEGER NOT NULL,
+    n            BIGINT NOT NULL DEFAULT 0,
+    rssi_sum     DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rssi_n       BIGINT NOT NULL DEFAULT 0,
+    max_range_km DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (bearing_bin, range_bin)
+);
+
+CREATE TABLE IF NOT EXISTS public.coverage_state (
+    id               INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    last_position_id BIGINT NOT NULL DEFAULT 0,
+    lat              DOUBLE PRECISION NOT NULL,
+    lon              DOUBLE PRECISION NOT NULL,
+    bearing_step_deg DOUBLE PRECISION NOT NULL,
+    range_step_km    DOUBLE PRECISION NOT NULL,
+    updated_at       TIMESTAMP NOT NULL DEFAULT now()
+);
+
+-- ============================================================
+-- TABLE: aircraft_tracks_compact
+-- Closed days of aircraft_positions_history, folded by the ingest
+-- worker into one row per (hex, flight, source) segment. Vertices are an
+-- encoded polyline (precision 5, ~1 m); the arrays hold one entry
+-- per vertex. Rebuild points with public.decode_compact_track().
+-- ============================================================
+CREATE TABLE IF NOT EXISTS public.aircraft_tracks_compact (
+    id          BIGSERIAL PRIMARY KEY,
+    hex         TEXT NOT NULL,
+    flight      TEXT NOT NULL,
+    source      TEXT,                -- receiver, as in positions_history
+    start_time  TIMESTAMP NOT NULL,
+    end_time    TIMESTAMP NOT NULL,
+    n_points    INTEGER NOT NULL,
+    path        TEXT NOT NULL,       -- ST_AsEncodedPolyline(..., 5)
+    t_ms        INTEGER[] NOT NULL,  -- milliseconds since start_time
+    alt_baro    TEXT[] NOT NULL,     -- as in data->>'alt_baro' ("ground" kept)
+    rssi        REAL[] NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_aircraft_tracks_compact_hex
+    ON public.aircraft_tracks_compact(hex);
+CREATE INDEX IF NOT EXISTS idx_aircraft_tracks_compact_start_time
+    ON public.aircraft_tracks_compact(start_time);
+CREATE INDEX IF NOT EXISTS idx_aircraft_tracks_compact_end_time
+    ON public.aircraft_tracks_compact(end_time);
+
+CREATE OR REPLACE FUNCTION public.decode_compact_track(t public.aircraft_tracks_compact)
+RETURNS TABLE (
+    observed_at TIMESTAMP,
+    lat         DOUBLE PRECISION,
+    lon         DOUBLE PRECISION,
+    alt_baro    TEXT,
+    rssi        REAL
+)
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT
+        t.start_time + make_interval(secs => t.t_ms[(d.path)[1]] / 1000.0),
+        ST_Y(d.geom),
+        ST_X(d.geom),
+        t.alt_baro[(d.path)[1]],
+        t.rssi[(d.path)[1]]
+    FROM ST_DumpPoints(ST_LineFromEncodedPolyline(t.path, 5)) AS d
+    ORDER BY (d.path)[1];
+$$;
+
 -- ============================================================
 -- TABLE: aircraft_categories
 -- ============================================================
@@ -185,23 +269,31 @@ GRANT USAGE ON SCHEMA public TO adsb_api, adsb_ingest;
 
 -- API: read-only
 GRANT SELECT ON TABLE
+    public.aircraft_positions_history,
     public.aircraft_live,
     public.aircraft_paths_live,
     public.aircraft_paths_history,
     public.aircraft_registry,
-    public.aircraft_categories
+    public.aircraft_categories,
+    public.receiver_coverage,
+    public.coverage_state,
+    public.aircraft_tracks_compact
 TO adsb_api;
 
 -- INGEST: write privileges
-GRANT SELECT, INSERT ON TABLE
+-- DELETE: compaction folds closed days into aircraft_tracks_compact
+GRANT SELECT, INSERT, DELETE ON TABLE
     public.aircraft_positions_history
 TO adsb_ingest;
 GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE
     public.aircraft_live,
-    public.aircraft_paths_live
+    public.aircraft_paths_live,
+    public.receiver_coverage,
+    public.coverage_state
 TO adsb_ingest;
 GRANT SELECT, INSERT ON TABLE
-    public.aircraft_paths_history
+    public.aircraft_paths_history,
+    public.aircraft_tracks_compact
 TO adsb_ingest;
 
 GRANT USAGE, SELECT ON ALL SEQUENCES IN SCHEMA public TO adsb_ingest;
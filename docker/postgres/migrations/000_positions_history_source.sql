@@ -0,0 +1,14 @@
+-- ============================================================
+-- MIGRATION 000: receiver source on aircraft_positions_history
+--
+-- Apply before deploying the multi-receiver ingest worker, which writes
+-- `source` with every position. Without the column every position insert
+-- fails and rolls back that aircraft's live/path upserts with it:
+--
+--   docker exec -i postgis_db psql -U admin -d spatial_db -v ON_ERROR_STOP=1 \
+--     < docker/postgres/migrations/000_positions_history_source.sql
+--
+-- Idempotent; safe to run more than once.
+-- ============================================================
+ALTER TABLE public.aircraft_positions_history
+    ADD COLUMN IF NOT EXISTS source TEXT;
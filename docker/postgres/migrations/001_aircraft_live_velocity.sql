@@ -0,0 +1,17 @@
+-- ============================================================
+-- MIGRATION 001: aircraft_live velocity columns (dead reckoning)
+--
+-- init-postgis.sql only runs when the data volume is created. On an
+-- existing database apply this BEFORE deploying the ingest worker that
+-- writes gs / baro_rate / pos_seen, otherwise every live upsert fails
+-- (and its savepoint rollback also drops that aircraft's position row):
+--
+--   docker exec -i postgis_db psql -U admin -d spatial_db -v ON_ERROR_STOP=1 \
+--     < docker/postgres/migrations/001_aircraft_live_velocity.sql
+--
+-- Idempotent; safe to run more than once.
+-- ============================================================
+ALTER TABLE public.aircraft_live
+    ADD COLUMN IF NOT EXISTS gs DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS baro_rate DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS pos_seen TIMESTAMP;
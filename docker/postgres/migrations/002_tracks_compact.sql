@@ -0,0 +1,59 @@
+-- ============================================================
+-- MIGRATION 002: compacted position history
+--
+-- Apply before deploying the ingest worker with COMPACT_KEEP_DAYS > 0
+-- and the API whose /playback and coverage read compacted days. Creates
+-- aircraft_tracks_compact, its indexes and decode_compact_track(), and
+-- lets the ingest role fold raw positions into it (DELETE on
+-- aircraft_positions_history). Without it every compaction run fails
+-- (raw rows are kept) and /playback fails:
+--
+--   docker exec -i postgis_db psql -U admin -d spatial_db -v ON_ERROR_STOP=1 \
+--     < docker/postgres/migrations/002_tracks_compact.sql
+--
+-- Idempotent; safe to run more than once.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS public.aircraft_tracks_compact (
+    id          BIGSERIAL PRIMARY KEY,
+    hex         TEXT NOT NULL,
+    flight      TEXT NOT NULL,
+    source      TEXT,                -- receiver, as in positions_history
+    start_time  TIMESTAMP NOT NULL,
+    end_time    TIMESTAMP NOT NULL,
+    n_points    INTEGER NOT NULL,
+    path        TEXT NOT NULL,       -- ST_AsEncodedPolyline(..., 5)
+    t_ms        INTEGER[] NOT NULL,  -- milliseconds since start_time
+    alt_baro    TEXT[] NOT NULL,     -- as in data->>'alt_baro' ("ground" kept)
+    rssi        REAL[] NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_aircraft_tracks_compact_hex
+    ON public.aircraft_tracks_compact(hex);
+CREATE INDEX IF NOT EXISTS idx_aircraft_tracks_compact_start_time
+    ON public.aircraft_tracks_compact(start_time);
+CREATE INDEX IF NOT EXISTS idx_aircraft_tracks_compact_end_time
+    ON public.aircraft_tracks_compact(end_time);
+
+CREATE OR REPLACE FUNCTION public.decode_compact_track(t public.aircraft_tracks_compact)
+RETURNS TABLE (
+    observed_at TIMESTAMP,
+    lat         DOUBLE PRECISION,
+    lon         DOUBLE PRECISION,
+    alt_baro    TEXT,
+    rssi        REAL
+)
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT
+        t.start_time + make_interval(secs => t.t_ms[(d.path)[1]] / 1000.0),
+        ST_Y(d.geom),
+        ST_X(d.geom),
+        t.alt_baro[(d.path)[1]],
+        t.rssi[(d.path)[1]]
+    FROM ST_DumpPoints(ST_LineFromEncodedPolyline(t.path, 5)) AS d
+    ORDER BY (d.path)[1];
+$$;
+
+GRANT SELECT ON TABLE public.aircraft_tracks_compact TO adsb_api;
+GRANT SELECT, INSERT ON TABLE public.aircraft_tracks_compact TO adsb_ingest;
+GRANT USAGE, SELECT ON SEQUENCE public.aircraft_tracks_compact_id_seq TO adsb_ingest;
+GRANT DELETE ON TABLE public.aircraft_positions_history TO adsb_ingest;
@@ -0,0 +1,13 @@
+-- ============================================================
+-- MIGRATION 003: API read access to aircraft_positions_history
+--
+-- Apply before deploying the API with /playback, which reads raw
+-- positions; without the grant every playback request fails with
+-- "permission denied":
+--
+--   docker exec -i postgis_db psql -U admin -d spatial_db -v ON_ERROR_STOP=1 \
+--     < docker/postgres/migrations/003_api_positions_history_select.sql
+--
+-- Idempotent; safe to run more than once.
+-- ============================================================
+GRANT SELECT ON TABLE public.aircraft_positions_history TO adsb_api;
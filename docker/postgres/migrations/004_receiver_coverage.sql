@@ -0,0 +1,41 @@
+-- ============================================================
+-- MIGRATION 004: receiver coverage tables
+--
+-- Apply before deploying the ingest worker that fills the coverage grid
+-- and the API with /coverage. Without the tables the worker logs a
+-- coverage failure every cycle (compaction, which waits for coverage,
+-- never runs) and /coverage answers 500:
+--
+--   docker exec -i postgis_db psql -U admin -d spatial_db -v ON_ERROR_STOP=1 \
+--     < docker/postgres/migrations/004_receiver_coverage.sql
+--
+-- Idempotent; safe to run more than once.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS public.receiver_coverage (
+    bearing_bin  INTEGER NOT NULL,
+    range_bin    INTEGER NOT NULL,
+    n            BIGINT NOT NULL DEFAULT 0,
+    rssi_sum     DOUBLE PRECISION NOT NULL DEFAULT 0,
+    rssi_n       BIGINT NOT NULL DEFAULT 0,
+    max_range_km DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (bearing_bin, range_bin)
+);
+
+CREATE TABLE IF NOT EXISTS public.coverage_state (
+    id               INTEGER PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    last_position_id BIGINT NOT NULL DEFAULT 0,
+    lat              DOUBLE PRECISION NOT NULL,
+    lon              DOUBLE PRECISION NOT NULL,
+    bearing_step_deg DOUBLE PRECISION NOT NULL,
+    range_step_km    DOUBLE PRECISION NOT NULL,
+    updated_at       TIMESTAMP NOT NULL DEFAULT now()
+);
+
+GRANT SELECT ON TABLE
+    public.receiver_coverage,
+    public.coverage_state
+TO adsb_api;
+GRANT SELECT, INSERT, UPDATE, DELETE ON TABLE
+    public.receiver_coverage,
+    public.coverage_state
+TO adsb_ingest;
@@ -1,4 +1,16 @@
 #!/usr/bin/env bash
+# Usage: backup_postgres.sh [full|incremental]   (default: full)
+#
+# full         pg_dump -Fc of the whole database, rotated after KEEP_DAYS
+# incremental  only the closed days not exported yet (see readme.md):
+#   incremental/schema.sql.gz           schema, refreshed every run
+#   incremental/small/<date>.dump       small tables (registry, categories,
+#                                       coverage), rotated after KEEP_DAYS
+#   incremental/ranges/<day>/<table>.copy.gz   one file per table per day
+#                                       (positions + compacted tracks of a
+#                                       day come from one snapshot)
+#   incremental/watermarks              next day to export, per table
+# Restore with scripts/restore_incremental.sh.
 set -euo pipefail
 
 BACKUP_DIR="/media/trygg/tryggvi_flakkari/adsb_backups"
@@ -7,6 +19,24 @@ DB_NAME="spatial_db"
 DB_USER="admin"
 KEEP_DAYS=30
 
+MODE="${1:-full}"
+
+# Growing tables exported by day: "table column" (column = watermark),
+# optionally followed by "table column" of a table the first one's rows
+# move into. Compaction moves a day of aircraft_positions_history into
+# aircraft_tracks_compact, so both are read from one snapshot: each
+# position lands in exactly one of the two files, never in both.
+RANGE_TABLES=(
+  "aircraft_positions_history observed_at aircraft_tracks_compact start_time"
+  "aircraft_paths_history end_time"
+)
+SMALL_TABLES=(
+  aircraft_registry
+  aircraft_categories
+  receiver_coverage
+  coverage_state
+)
+
 # Ensure drive is mounted
 if ! mountpoint -q "$(dirname "$BACKUP_DIR")"; then
   echo "[ERROR] Drive not mounted at $(dirname "$BACKUP_DIR")"
@@ -16,24 +46,186 @@ fi
 mkdir -p "$BACKUP_DIR"
 
 DATE="$(date +%F)"
-OUT="$BACKUP_DIR/adsb_${DATE}.dump"
-TMP="$OUT.tmp"
 
-echo "[INFO] Creating backup: $OUT"
-docker exec "$DB_CONTAINER" pg_dump -U "$DB_USER" -Fc "$DB_NAME" > "$TMP"
+psql_db() {
+  docker exec -i "$DB_CONTAINER" psql -U "$DB_USER" -d "$DB_NAME" -v ON_ERROR_STOP=1 -At "$@"
+}
 
-# basic sanity: non-empty file
-if [ ! -s "$TMP" ]; then
-  echo "[ERROR] Backup file is empty: $TMP"
-  rm -f "$TMP"
-  exit 1
-fi
+# Move a finished "$1.tmp" into place; refuse empty output.
+# Writers go to .tmp first so a failed dump (set -e/pipefail) never
+# replaces a good file.
+finalize() {
+  local out="$1" tmp="$1.tmp"
+  if [ ! -s "$tmp" ]; then
+    echo "[ERROR] Backup file is empty: $tmp"
+    rm -f "$tmp"
+    exit 1
+  fi
+  mv "$tmp" "$out"
+  chmod 600 "$out"
+}
+
+backup_full() {
+  local out="$BACKUP_DIR/adsb_${DATE}.dump"
+
+  echo "[INFO] Creating backup: $out"
+  docker exec "$DB_CONTAINER" pg_dump -U "$DB_USER" -Fc "$DB_NAME" > "$out.tmp"
+  finalize "$out"
+
+  echo "[INFO] Rotating backups older than ${KEEP_DAYS} days"
+  find "$BACKUP_DIR" -maxdepth 1 -type f -name "*.dump" -mtime +"$KEEP_DAYS" -print -delete
+
+  echo "[INFO] Done. Latest:"
+  ls -lh "$out"
+}
+
+# ---------- incremental ----------
+
+INC_DIR="$BACKUP_DIR/incremental"
+WATERMARKS="$INC_DIR/watermarks"
+
+get_watermark() {
+  [ -f "$WATERMARKS" ] && awk -F= -v k="$1" '$1 == k { print $2 }' "$WATERMARKS" || true
+}
+
+set_watermark() {
+  local tmp="$WATERMARKS.tmp"
+  { [ -f "$WATERMARKS" ] && grep -v "^$1=" "$WATERMARKS" || true; echo "$1=$2"; } > "$tmp"
+  mv "$tmp" "$WATERMARKS"
+}
+
+# Non-generated columns, in table order (generated ones cannot be COPYed in)
+table_columns() {
+  psql_db -c "
+    SELECT string_agg(quote_ident(column_name), ',' ORDER BY ordinal_position)
+    FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = '$1' AND is_generated = 'NEVER';"
+}
+
+day_copy() {
+  local table="$1" column="$2" cols="$3" day="$4" next="$5"
+  echo "
+      COPY (
+        SELECT $cols FROM public.$table
+        WHERE $column >= '$day' AND $column < '$next'
+        ORDER BY $column
+      ) TO STDOUT;"
+}
+
+# One day of `table` and, in the same REPEATABLE READ snapshot, of
+# `moved`. psql writes both COPYs to one stream, separated by a "\."
+# line (text COPY escapes every backslash, so no data line can be "\.");
+# awk splits it into the two gzipped .tmp files.
+export_day_pair() {
+  local table="$1" column="$2" cols="$3" moved="$4" moved_column="$5" moved_cols="$6"
+  local day="$7" next="$8"
+  local out="$INC_DIR/ranges/$day/$table.copy.gz"
+  local moved_out="$INC_DIR/ranges/$day/$moved.copy.gz"
+
+  {
+    echo "BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY;"
+    day_copy "$table" "$column" "$cols" "$day" "$next"
+    echo "SELECT '\\.';"
+    day_copy "$moved" "$moved_column" "$moved_cols" "$day" "$next"
+    echo "COMMIT;"
+  } | psql_db -q \
+    | nice -n 10 awk -v a="gzip -6 > '$out.tmp'" -v b="gzip -6 > '$moved_out.tmp'" '
+        BEGIN { out = a; printf "" | a; printf "" | b }
+        out == a && $0 == "\\." { out = b; next }
+        { print | out }
+        END {
+          if (close(a) != 0 || close(b) != 0) exit 1
+          if (out != b) { print "[ERROR] snapshot split marker missing" > "/dev/stderr"; exit 1 }
+        }'
+  finalize "$out"
+  finalize "$moved_out"
+  echo "$cols" > "$INC_DIR/ranges/$day/$table.columns"
+  echo "$moved_cols" > "$INC_DIR/ranges/$day/$moved.columns"
+}
+
+export_ranges() {
+  local table="$1" column="$2" moved="${3:-}" moved_column="${4:-}"
+  local today day next cols moved_cols out
+  today="$(date +%F)"
+
+  day="$(get_watermark "$table")"
+  if [ -z "$day" ]; then
+    if [ -n "$moved" ]; then
+      # Start at the oldest day in either form
+      day="$(psql_db -c "
+        SELECT least(
+          (SELECT min($column) FROM public.$table),
+          (SELECT min($moved_column) FROM public.$moved))::date;")"
+    else
+      day="$(psql_db -c "SELECT min($column)::date FROM public.$table;")"
+    fi
+    if [ -z "$day" ]; then
+      echo "[INFO] $table: empty, nothing to export"
+      return
+    fi
+  fi
+
+  cols="$(table_columns "$table")"
+  if [ -n "$moved" ]; then
+    moved_cols="$(table_columns "$moved")"
+  fi
+
+  # Closed days only: [watermark, today)
+  while [[ "$day" < "$today" ]]; do
+    next="$(date -d "$day + 1 day" +%F)"
+    mkdir -p "$INC_DIR/ranges/$day"
+
+    if [ -n "$moved" ]; then
+      echo "[INFO] $table + $moved: [$day, $next)"
+      export_day_pair "$table" "$column" "$cols" "$moved" "$moved_column" "$moved_cols" \
+        "$day" "$next"
+    else
+      echo "[INFO] $table: $column in [$day, $next)"
+      out="$INC_DIR/ranges/$day/$table.copy.gz"
+      psql_db -c "$(day_copy "$table" "$column" "$cols" "$day" "$next")" \
+        | nice -n 10 gzip -6 > "$out.tmp"
+      finalize "$out"
+      echo "$cols" > "$INC_DIR/ranges/$day/$table.columns"
+    fi
+
+    # Advance only after the day's files are safely in place
+    set_watermark "$table" "$next"
+    day="$next"
+  done
+}
+
+backup_incremental() {
+  mkdir -p "$INC_DIR/small"
+
+  echo "[INFO] Schema -> $INC_DIR/schema.sql.gz"
+  docker exec "$DB_CONTAINER" pg_dump -U "$DB_USER" --schema-only "$DB_NAME" \
+    | gzip -6 > "$INC_DIR/schema.sql.gz.tmp"
+  finalize "$INC_DIR/schema.sql.gz"
+
+  local small_out="$INC_DIR/small/${DATE}.dump"
+  local table_args=()
+  for t in "${SMALL_TABLES[@]}"; do table_args+=(-t "public.$t"); done
+
+  echo "[INFO] Small tables -> $small_out"
+  docker exec "$DB_CONTAINER" pg_dump -U "$DB_USER" -Fc --data-only "${table_args[@]}" "$DB_NAME" \
+    > "$small_out.tmp"
+  finalize "$small_out"
+  find "$INC_DIR/small" -type f -name "*.dump" -mtime +"$KEEP_DAYS" -print -delete
 
-mv "$TMP" "$OUT"
-chmod 600 "$OUT"
+  for entry in "${RANGE_TABLES[@]}"; do
+    # shellcheck disable=SC2086
+    export_ranges $entry
+  done
 
-echo "[INFO] Rotating backups older than ${KEEP_DAYS} days"
-find "$BACKUP_DIR" -type f -name "*.dump" -mtime +"$KEEP_DAYS" -print -delete
+  echo "[INFO] Done. Watermarks:"
+  cat "$WATERMARKS" 2>/dev/null || true
+}
 
-echo "[INFO] Done. Latest:"
-ls -lh "$OUT"
+case "$MODE" in
+  full) backup_full ;;
+  incremental) backup_incremental ;;
+  *)
+    echo "Usage: $0 [full|incremental]"
+    exit 2
+    ;;
+esac
@@ -0,0 +1,65 @@
+"""
+scripts/bench_data.py
+Synthetic dump1090 aircraft messages shared by the benchmark scripts.
+Same field set as simulate_aircraft.py, but for any number of aircraft.
+"""
+
+import random
+
+CENTER_LAT = 64.13
+CENTER_LON = -21.94
+
+
+def fake_aircraft(n, seed=1, with_position=0.8):
+    """Return n dump1090-style aircraft dicts (~with_position have lat/lon)."""
+    rnd = random.Random(seed)
+    aircraft = []
+
+    for i in range(n):
+        entry = {
+            "hex": f"4c{i:04x}",
+            "flight": f"ICE{i:03d}  ",
+            "category": rnd.choice(["A1", "A2", "A3", "A5", "A7"]),
+            "squawk": f"{rnd.randint(1000, 7777)}",
+            "messages": rnd.randint(100, 5000),
+            "seen": round(rnd.uniform(0, 5), 1),
+            "rssi": round(rnd.uniform(-30, -10), 1),
+            "mlat": [],
+            "tisb": [],
+        }
+
+        if rnd.random() < with_position:
+            alt = rnd.choice([1000, 3000, 8000, 15000, 30000, 35000])
+            entry.update({
+                "lat": round(CENTER_LAT + rnd.uniform(-1.5, 1.5), 6),
+                "lon": round(CENTER_LON + rnd.uniform(-3, 3), 6),
+                "alt_baro": alt,
+                "alt_geom": alt - 200,
+                "track": round(rnd.uniform(0, 360), 1),
+                "gs": round(rnd.uniform(120, 480), 1),
+                "baro_rate": rnd.choice([-1024, -512, 0, 0, 0, 512, 1024]),
+                "seen_pos": round(rnd.uniform(0, 3), 1),
+                "nic": 8,
+                "rc": 186,
+                "version": 2,
+                "nac_p": 10,
+                "sil": 3,
+                "emergency": "none",
+            })
+
+        aircraft.append(entry)
+
+    return aircraft
+
+
+def move(aircraft, seconds=2.0, seed=None):
+    """Advance positioned aircraft along their track (cheap, not geodesic)."""
+    rnd = random.Random(seed)
+    for ac in aircraft:
+        if "lat" not in ac:
+            continue
+        ac["lat"] = round(ac["lat"] + ac["gs"] * seconds * 4.6e-6 * rnd.uniform(0.5, 1.5), 6)
+        ac["lon"] = round(ac["lon"] + ac["gs"] * seconds * 1.0e-5 * rnd.uniform(-1, 1), 6)
+        ac["seen"] = round(rnd.uniform(0, 1), 1)
+        ac["seen_pos"] = ac["seen"]
+    return aircraft
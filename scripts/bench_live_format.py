@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_live_format.py
+Payload size and encode time of /live_aircraft: JSON vs columns vs binary.
+
+Uses synthetic rows shaped like LIVE_AIRCRAFT_SQL results, so no DB needed.
+Sizes are reported raw and gzipped (what nginx sends).
+
+Usage: python scripts/bench_live_format.py [n_aircraft ...]
+"""
+
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_data import fake_aircraft  # noqa: E402
+from src.api_queries import (  # noqa: E402
+    live_aircraft_binary,
+    live_aircraft_columns,
+    live_aircraft_payload,
+)
+
+REPEAT = 200
+
+
+def fake_rows(n):
+    now = time.time()
+    rows = []
+    for ac in fake_aircraft(n):
+        rows.append((
+            ac["hex"], ac["flight"], ac["category"], ac.get("lat"), ac.get("lon"),
+            str(ac["alt_baro"]) if "alt_baro" in ac else None, ac.get("track"),
+            now - ac["seen"], round(ac["seen"] * 37.3, 1) if "lat" in ac else None,
+            ac.get("gs"), ac.get("baro_rate"),
+            now - ac["seen_pos"] if "seen_pos" in ac else None,
+        ))
+    return rows
+
+
+def to_json(payload):
+    # Same as Flask's compact jsonify
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+ENCODERS = {
+    "json": lambda rows: to_json(live_aircraft_payload(rows)),
+    "columns": lambda rows: to_json(live_aircraft_columns(rows)),
+    "binary": live_aircraft_binary,
+}
+
+
+def run():
+    sizes = [int(a) for a in sys.argv[1:]] or [20, 100, 400]
+
+    for n in sizes:
+        rows = fake_rows(n)
+        print(f"== {n} aircraft ==")
+        base = None
+        for name, encode in ENCODERS.items():
+            t0 = time.perf_counter()
+            for _ in range(REPEAT):
+                body = encode(rows)
+            encode_us = (time.perf_counter() - t0) / REPEAT * 1e6
+            gz = len(gzip.compress(body, 6))
+            base = base or (len(body), gz)
+            print(
+                f"  {name:8s} {len(body):7d} B ({len(body) / base[0]:4.0%})  "
+                f"gzip {gz:6d} B ({gz / base[1]:4.0%})  encode {encode_us:8.1f} us"
+            )
+
+
+if __name__ == "__main__":
+    run()
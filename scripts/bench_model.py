@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_model.py
+Per-tick CPU and memory of the ingest hot path: raw dump1090 dicts (the old
+code path, reproduced below) vs Aircraft records (aircraft_model.py).
+
+One tick = parse the receiver snapshot, merge/age it, spool it, read it back
+and build the parameters of the three per-aircraft statements. Statements go
+to a fake cursor, so no DB is needed.
+
+CPU is process time per tick; memory is the tracemalloc peak of one tick and
+the size of the per-hex state the reader threads keep between ticks.
+
+Usage: python scripts/bench_model.py [n_aircraft ...]
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+# Only module constants are read; nothing connects
+for var in ("PGDATABASE", "PGUSER", "PGPASSWORD"):
+    os.environ.setdefault(var, "bench")
+
+import aircraft_ingest_pg as ingest  # noqa: E402
+from aircraft_model import Aircraft  # noqa: E402
+from bench_data import fake_aircraft  # noqa: E402
+
+TICKS = 200
+
+
+class FakeCursor:
+    def execute(self, query, params=None, prepare=None):
+        pass
+
+
+# ------------------------------------------------------------
+# Dict-based path (before aircraft_model.py)
+# ------------------------------------------------------------
+
+
+def _safe_float(v, default=0.0):
+    try:
+        return float(v)
+    except Exception:
+        return float(default)
+
+
+def dict_params(msg, observed_at, source):
+    lat = msg.get("lat")
+    lon = msg.get("lon")
+    position = {
+        "hex": msg.get("hex"), "observed_at": observed_at, "source": source,
+        "flight": (msg.get("flight") or "").strip(),
+        "has_pos": lat is not None and lon is not None,
+        "lat": lat, "lon": lon, "data": json.dumps(msg),
+    }
+
+    seen = _safe_float(msg.get("seen"), 0.0)
+    lat = msg.get("lat")
+    lon = msg.get("lon")
+    live = {
+        "hex": msg.get("hex"), "has_pos": lat is not None and lon is not None,
+        "flight": (msg.get("flight") or "").strip(), "category": msg.get("category"),
+        "observed_at": observed_at, "seen": seen, "lat": lat, "lon": lon,
+        "alt_baro": None if msg.get("alt_baro") is None else str(msg.get("alt_baro")),
+        "track": None if msg.get("track") is None else _safe_float(msg.get("track")),
+        "data": json.dumps(msg),
+    }
+
+    seen = _safe_float(msg.get("seen"), 0.0)
+    seen_pos = _safe_float(msg.get("seen_pos"), 999.0)
+    lat = msg.get("lat")
+    lon = msg.get("lon")
+    path = {
+        "hex": msg.get("hex"), "flight": (msg.get("flight") or "").strip(),
+        "category": msg.get("category"), "lat": lat, "lon": lon,
+        "observed_at": observed_at, "seen": seen,
+        "can_use_pos": lat is not None and lon is not None and seen_pos <= 30,
+    }
+    return position, live, path
+
+
+def dict_tick(snapshot_text, now):
+    state = json.loads(snapshot_text)["aircraft"]  # reader thread
+
+    observations = []
+    for ac in state:
+        if not ac.get("hex"):
+            continue
+        msg = dict(ac)
+        msg["seen"] = _safe_float(ac.get("seen"), 0.0) + 0.5
+        if ac.get("seen_pos") is not None:
+            msg["seen_pos"] = _safe_float(ac.get("seen_pos"), 999.0) + 0.5
+        observations.append(("bench", msg))
+
+    payload = json.dumps(observations, separators=(",", ":"))  # spool
+    cur = FakeCursor()
+    for source, msg in json.loads(payload):
+        for params in dict_params(msg, now, source):
+            cur.execute("", params)
+    return state
+
+
+# ------------------------------------------------------------
+# Record-based path
+# ------------------------------------------------------------
+
+
+def record_tick(snapshot_text, now):
+    state = [  # reader thread
+        ac for ac in map(Aircraft.from_msg, json.loads(snapshot_text)["aircraft"])
+        if ac is not None
+    ]
+
+    observations = ingest.merge_observations([("bench", state, now - 0.5)], now)
+
+    payload = ingest.encode_tick(observations)  # spool
+    cur = FakeCursor()
+    for source, ac in ingest.decode_tick(payload):
+        ingest.insert_position(cur, ac, now, source)
+        ingest.upsert_live_aircraft(cur, ac, now)
+        ingest.upsert_live_path(cur, ac, now)
+    return state
+
+
+# ------------------------------------------------------------
+# Measurement
+# ------------------------------------------------------------
+
+
+def deep_size(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(v, seen) for v in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_size(getattr(obj, s), seen) for s in obj.__slots__)
+    return size
+
+
+def measure(tick, snapshot_text):
+    cpu = []
+    for _ in range(TICKS):
+        t0 = time.process_time()
+        tick(snapshot_text, time.time())
+        cpu.append((time.process_time() - t0) * 1000)
+
+    tracemalloc.start()
+    state = tick(snapshot_text, time.time())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return statistics.mean(cpu), statistics.median(cpu), peak, deep_size(state)
+
+
+def run():
+    sizes = [int(a) for a in sys.argv[1:]] or [100, 500, 2000]
+
+    print(f"{'aircraft':>8}  {'path':<7} {'cpu mean':>9} {'cpu p50':>8} {'peak KiB':>9} {'state KiB':>10}")
+    for n in sizes:
+        snapshot_text = json.dumps({"now": time.time(), "aircraft": fake_aircraft(n)})
+        for name, tick in (("dict", dict_tick), ("record", record_tick)):
+            mean, p50, peak, state = measure(tick, snapshot_text)
+            print(
+                f"{n:>8}  {name:<7} {mean:7.2f}ms {p50:6.2f}ms "
+                f"{peak / 1024:9.1f} {state / 1024:10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    run()
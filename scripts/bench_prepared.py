@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_prepared.py
+Planner statistics + per-tick timing for the hot ingest and API statements,
+unprepared vs prepared (cur.execute(..., prepare=True)).
+
+1. Planning time of each statement (EXPLAIN (SUMMARY ON)), i.e. the cost a
+   prepared statement no longer pays on every execution.
+2. Ingest: N ticks of synthetic aircraft written with every statement
+   re-parsed/re-planned vs prepared. Runs inside one transaction that is
+   rolled back, so nothing is left in the database.
+3. API: each route query executed repeatedly, unprepared vs prepared.
+
+Needs a role that can INSERT into the live tables (e.g. .env.ingest creds).
+
+Usage: python scripts/bench_prepared.py [n_aircraft] [ticks]
+"""
+
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT))
+
+import psycopg  # noqa: E402
+
+import aircraft_ingest_pg as ingest  # noqa: E402
+from aircraft_model import Aircraft  # noqa: E402
+from bench_data import fake_aircraft, move  # noqa: E402
+from src import api_queries  # noqa: E402
+
+API_STATEMENTS = [
+    "LIVE_AIRCRAFT_SQL",
+    "LIVE_PATHS_SQL",
+    "PATHS_SINCE_MIDNIGHT_SQL",
+    "STATS_SQL",
+]
+API_REPEAT = 50
+
+
+class Unprepared:
+    """Cursor proxy that forces every statement through parse + plan."""
+
+    def __init__(self, cur):
+        self._cur = cur
+
+    def execute(self, query, params=None, prepare=None):
+        return self._cur.execute(query, params, prepare=False)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+def planning_ms(cur, sql, params=None):
+    cur.execute("EXPLAIN (SUMMARY ON) " + sql.strip().rstrip(";"), params)
+    for (line,) in cur.fetchall():
+        m = re.search(r"Planning Time: ([\d.]+) ms", line)
+        if m:
+            return float(m.group(1))
+    return None
+
+
+def fmt(samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else samples[-1]
+    return f"mean {statistics.mean(samples):7.2f} ms  p50 {statistics.median(samples):7.2f}  p95 {p95:7.2f}"
+
+
+def bench_ingest(conn, aircraft, ticks, prepared):
+    samples = []
+    with conn.cursor() as raw:
+        cur = raw if prepared else Unprepared(raw)
+        for _ in range(ticks):
+            move(aircraft)
+            t0 = time.perf_counter()
+            records = [("bench", Aircraft.from_msg(ac)) for ac in aircraft]
+            ingest.write_tick(cur, time.time(), records)
+            samples.append((time.perf_counter() - t0) * 1000)
+    conn.rollback()
+    return samples
+
+
+def bench_api(conn, sql, prepared):
+    samples = []
+    with conn.cursor() as cur:
+        for _ in range(API_REPEAT):
+            t0 = time.perf_counter()
+            cur.execute(sql, prepare=prepared)
+            cur.fetchall()
+            samples.append((time.perf_counter() - t0) * 1000)
+    conn.rollback()
+    return samples
+
+
+def run():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    aircraft = fake_aircraft(n)
+    sample = next(ac for ac in aircraft if "lat" in ac)
+    params = {
+        "hex": sample["hex"], "flight": sample["flight"].strip(), "category": sample["category"],
+        "observed_at": time.time(), "source": "bench", "seen": 0.5,
+        "has_pos": True, "can_use_pos": True, "lat": sample["lat"], "lon": sample["lon"],
+        "alt_baro": str(sample["alt_baro"]), "track": sample["track"], "data": "{}",
+        "gs": sample["gs"], "baro_rate": float(sample["baro_rate"]), "seen_pos": 0.5,
+    }
+
+    with psycopg.connect(ingest.DB_DSN) as conn:
+        # Keep psycopg's own auto-prepare out of the baseline: only explicit
+        # prepare=True prepares. (None would disable prepare=True as well.)
+        conn.prepare_threshold = sys.maxsize
+
+        print("== Planning time per execution (what prepare=True saves) ==")
+        with conn.cursor() as cur:
+            for name in ("INSERT_POSITION_SQL", "UPSERT_LIVE_AIRCRAFT_SQL", "UPSERT_LIVE_PATH_SQL"):
+                print(f"  {name:28s} {planning_ms(cur, getattr(ingest, name), params):6.3f} ms")
+            for name in API_STATEMENTS:
+                print(f"  {name:28s} {planning_ms(cur, getattr(api_queries, name)):6.3f} ms")
+        conn.rollback()
+
+        print(f"\n== Ingest: {n} aircraft x {ticks} ticks (rolled back) ==")
+        print("  unprepared", fmt(bench_ingest(conn, fake_aircraft(n), ticks, prepared=False)))
+        print("  prepared  ", fmt(bench_ingest(conn, fake_aircraft(n), ticks, prepared=True)))
+
+        print(f"\n== API queries x {API_REPEAT} ==")
+        for name in API_STATEMENTS:
+            sql = getattr(api_queries, name)
+            print(f"  {name}")
+            print("    unprepared", fmt(bench_api(conn, sql, prepared=False)))
+            print("    prepared  ", fmt(bench_api(conn, sql, prepared=True)))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+scripts/bench_startup.py
+Worker startup time and first-request latency of the API, with pool
+warm-up (POOL_WARMUP=1) vs without (POOL_WARMUP=0).
+
+For each mode a single-worker gunicorn is started on a free local port:
+- ready   = seconds from spawn until /readyz answers 200
+- first   = latency of the first request to each hot route
+- warm    = median of the next WARM_REPEAT requests to the same route
+
+Needs the API env (.env.api: PG*), gunicorn and a reachable database.
+
+Usage: python scripts/bench_startup.py [--async] [--runs N]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ROUTES = ["/live_aircraft", "/live_paths", "/paths_since_midnight", "/stats", "/coverage"]
+WARM_REPEAT = 5
+BOOT_TIMEOUT = 60
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get_ms(url):
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as resp:
+            resp.read()
+    except urllib.error.HTTPError as e:
+        e.read()
+    return (time.perf_counter() - t0) * 1000
+
+
+def gunicorn_cmd(port, use_async):
+    cmd = [sys.executable, "-m", "gunicorn", "--workers", "1", "--bind", f"127.0.0.1:{port}"]
+    if use_async:
+        return cmd + ["-k", "uvicorn.workers.UvicornWorker", "src.aircraft_digest_async:app"]
+    return cmd + ["-c", "src/gunicorn_conf.py", "--threads", "4", "src.aircraft_digest_flask:app"]
+
+
+def boot(port, use_async, warmup):
+    env = dict(os.environ, POOL_WARMUP="1" if warmup else "0")
+    proc = subprocess.Popen(
+        gunicorn_cmd(port, use_async),
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < BOOT_TIMEOUT:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=1):
+                return proc, time.perf_counter() - t0
+        except OSError:
+            if proc.poll() is not None:
+                raise RuntimeError("gunicorn exited during startup (check PG* env)")
+            time.sleep(0.02)
+
+    proc.terminate()
+    raise RuntimeError(f"not ready after {BOOT_TIMEOUT}s")
+
+
+def run_once(use_async, warmup):
+    port = free_port()
+    proc, ready_s = boot(port, use_async, warmup)
+    try:
+        first, warm = {}, {}
+        for route in ROUTES:
+            url = f"http://127.0.0.1:{port}{route}"
+            first[route] = get_ms(url)
+            warm[route] = statistics.median(get_ms(url) for _ in range(WARM_REPEAT))
+        return ready_s, first, warm
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def run():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    app = "async (Quart)" if args.use_async else "Flask"
+    print(f"{app}, 1 worker, {args.runs} runs per mode (medians)\n")
+
+    for warmup in (False, True):
+        results = [run_once(args.use_async, warmup) for _ in range(args.runs)]
+        ready = statistics.median(r[0] for r in results)
+
+        print(f"POOL_WARMUP={int(warmup)}  ready after {ready * 1000:7.1f} ms")
+        print(f"  {'route':<24}{'first':>10}{'warm':>10}")
+        for route in ROUTES:
+            first = statistics.median(r[1][route] for r in results)
+            warm = statistics.median(r[2][route] for r in results)
+            print(f"  {route:<24}{first:8.1f}ms{warm:8.1f}ms")
+        print()
+
+
+if __name__ == "__main__":
+    run()
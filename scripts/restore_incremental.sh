@@ -0,0 +1,81 @@
+#!/usr/bin/env bash
+# Usage: restore_incremental.sh <target_db> [until_day]
+#
+# Rebuilds a database from the incremental backups written by
+# "backup_postgres.sh incremental":
+#   1. schema.sql.gz
+#   2. latest small/<date>.dump (data only)
+#   3. ranges/<day>/<table>.copy.gz, oldest day first, up to until_day
+#   4. BIGSERIAL sequences moved past the restored ids
+#
+# The target database must exist and be empty (createdb inside the container).
+set -euo pipefail
+
+BACKUP_DIR="/media/trygg/tryggvi_flakkari/adsb_backups"
+INC_DIR="$BACKUP_DIR/incremental"
+DB_CONTAINER="postgis_db"
+DB_USER="admin"
+
+TARGET_DB="${1:-}"
+UNTIL_DAY="${2:-9999-12-31}"
+
+if [ -z "$TARGET_DB" ]; then
+  echo "Usage: $0 <target_db> [until_day YYYY-MM-DD]"
+  exit 2
+fi
+
+# Day files written by backup_postgres.sh. A day's positions and compacted
+# tracks come from one snapshot, so they never hold the same position twice.
+RANGE_TABLES=(
+  aircraft_positions_history
+  aircraft_paths_history
+  aircraft_tracks_compact
+)
+
+if [ ! -f "$INC_DIR/schema.sql.gz" ]; then
+  echo "[ERROR] No incremental backup in $INC_DIR"
+  exit 1
+fi
+
+psql_target() {
+  docker exec -i "$DB_CONTAINER" psql -U "$DB_USER" -d "$TARGET_DB" -v ON_ERROR_STOP=1 -q "$@"
+}
+
+echo "[INFO] Schema -> $TARGET_DB"
+gunzip -c "$INC_DIR/schema.sql.gz" | psql_target
+
+small="$(ls -1 "$INC_DIR"/small/*.dump 2>/dev/null | sort | tail -n 1 || true)"
+if [ -n "$small" ]; then
+  echo "[INFO] Small tables <- $small"
+  docker exec -i "$DB_CONTAINER" pg_restore -U "$DB_USER" -d "$TARGET_DB" \
+    --data-only --disable-triggers --exit-on-error < "$small"
+else
+  echo "[WARN] No small-table dump found"
+fi
+
+for dir in $(ls -1d "$INC_DIR"/ranges/*/ 2>/dev/null | sort); do
+  day="$(basename "$dir")"
+  if [[ "$day" > "$UNTIL_DAY" ]]; then
+    break
+  fi
+
+  for table in "${RANGE_TABLES[@]}"; do
+    file="$dir/$table.copy.gz"
+    [ -f "$file" ] || continue
+
+    echo "[INFO] $day $table"
+    cols="$(cat "$dir/$table.columns")"
+    gunzip -c "$file" | psql_target -c "COPY public.$table ($cols) FROM STDIN;"
+  done
+done
+
+echo "[INFO] Resetting sequences"
+for table in "${RANGE_TABLES[@]}"; do
+  psql_target -c "
+    SELECT setval(pg_get_serial_sequence('public.$table', 'id'),
+                  COALESCE(max(id), 0) + 1, false)
+    FROM public.$table;" > /dev/null
+done
+
+psql_target -c "ANALYZE;"
+echo "[INFO] Done. Restored into $TARGET_DB"
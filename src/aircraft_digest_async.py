@@ -0,0 +1,303 @@
+"""
+Async (ASGI) API for ADS-B live data.
+
+Same routes and JSON as aircraft_digest_flask.py, served by Quart on
+psycopg_pool.AsyncConnectionPool.
+
+Production notes:
+- A request only holds a pool connection while its query runs, and waiting
+  on Postgres does not block a thread, so one worker serves many clients.
+- Slow history queries (/paths_since_midnight, /stats) use their own small
+  pool (history lane, see api_db.py) so they can never starve the 2 s live polls;
+  /playback streams hold a connection for minutes and get a lane of their own.
+- Pools are opened in before_serving (after fork), never at import time,
+  and serving starts once they are warm (hot statements prepared, see
+  api_db.py) or POOL_WARM_TIMEOUT_SECONDS passed. /readyz reports it.
+- Snapshot routes are served precompressed like the Flask API
+  (api_snapshots.py); compression runs in a thread, off the event loop.
+
+Run:
+  gunicorn -k uvicorn.workers.UvicornWorker --workers 1 --bind 172.17.0.1:5000 \
+    src.aircraft_digest_async:app
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+from psycopg.errors import QueryCanceled
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from quart import Quart, Response, jsonify, request
+
+from src import api_snapshots as snapshots
+from src.api_db import (
+    LANES,
+    PLAYBACK_FETCH_ROWS,
+    POOL_TIMEOUT_SECONDS,
+    POOL_WARM_TIMEOUT_SECONDS,
+    DatabaseUnavailable,
+    PoolExhausted,
+    count_statement_timeout,
+    counters,
+    lent,
+    async_warm_connection,
+    pool_args,
+    pool_timeout_error,
+    pools_ready,
+)
+from src.api_queries import (
+    AIRCRAFT_DETAIL_FALLBACK_SQL,
+    AIRCRAFT_DETAIL_LIVE_SQL,
+    BINARY_MIME,
+    COLUMNS_MIME,
+    COVERAGE_CELLS_SQL,
+    COVERAGE_STATE_SQL,
+    LIVE_AIRCRAFT_SQL,
+    LIVE_PATHS_SQL,
+    PATHS_SINCE_MIDNIGHT_SQL,
+    PLAYBACK_MIME,
+    PLAYBACK_SQL,
+    STATS_SQL,
+    PlaybackBuckets,
+    aircraft_detail_payload,
+    coverage_payload,
+    live_aircraft_binary,
+    live_aircraft_columns,
+    live_aircraft_payload,
+    live_format,
+    live_paths_payload,
+    paths_since_midnight_payload,
+    playback_meta,
+    playback_params,
+    stats_payload,
+)
+
+app = Quart(__name__)
+
+# ------------------------------------------------------------
+# DB pools, one per lane (see api_db.py)
+# ------------------------------------------------------------
+
+pools = {
+    lane: AsyncConnectionPool(**pool_args(lane, async_warm_connection(lane)))
+    for lane in LANES
+}
+
+
+@app.before_serving
+async def open_pools():
+    for p in pools.values():
+        await p.open(wait=False)
+
+    # Lifespan startup: the worker accepts requests only after this returns
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + POOL_WARM_TIMEOUT_SECONDS
+    while not pools_ready():
+        if loop.time() >= deadline:
+            app.logger.warning("pools not warm after timeout, serving anyway")
+            break
+        await asyncio.sleep(0.05)
+
+
+@app.after_serving
+async def close_pools():
+    for p in pools.values():
+        await p.close()
+
+
+@asynccontextmanager
+async def connection(lane):
+    """Borrow a connection from `lane`, failing fast when the lane is full."""
+    try:
+        async with pools[lane].connection(timeout=POOL_TIMEOUT_SECONDS) as conn:
+            with lent(lane):
+                yield conn
+    except PoolTimeout:
+        raise pool_timeout_error(lane, pools[lane]) from None
+    except QueryCanceled:
+        count_statement_timeout(lane)
+        raise
+
+
+async def fetchall(lane, sql, params=None):
+    async with connection(lane) as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params, prepare=True)
+            return await cur.fetchall()
+
+
+async def fetchone(lane, sql, params=None):
+    async with connection(lane) as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(sql, params, prepare=True)
+            return await cur.fetchone()
+
+
+async def snapshot_response(key, body, mimetype="application/json", vary=()):
+    """Serve `body` precompressed per Accept-Encoding, 304 on a matching ETag."""
+    body, status, headers = await asyncio.to_thread(
+        snapshots.respond,
+        key,
+        body,
+        request.headers.get("Accept-Encoding"),
+        request.headers.get("If-None-Match"),
+        vary,
+    )
+    return Response(body, status=status, headers=headers, mimetype=mimetype)
+
+
+# ------------------------------------------------------------
+# Routes
+# ------------------------------------------------------------
+
+
+@app.errorhandler(Exception)
+async def handle_error(e):
+    app.logger.error("Unhandled exception: %s", e)
+    return jsonify({"error": "internal server error"}), 500
+
+
+@app.errorhandler(PoolExhausted)
+async def handle_pool_exhausted(e):
+    app.logger.warning("%s", e)
+    return jsonify({"error": "busy"}), 503, {"Retry-After": "1"}
+
+
+@app.errorhandler(DatabaseUnavailable)
+async def handle_db_unavailable(e):
+    app.logger.warning("%s", e)
+    return jsonify({"error": "database unavailable"}), 503, {"Retry-After": "5"}
+
+
+@app.errorhandler(QueryCanceled)
+async def handle_statement_timeout(e):
+    app.logger.warning("Statement timeout: %s", e)
+    return jsonify({"error": "query timeout"}), 503, {"Retry-After": "5"}
+
+
+@app.get("/healthz")
+async def healthz():
+    # Lightweight DB check on the reserved health lane
+    try:
+        await fetchone("health", "SELECT 1;")
+        return jsonify({"ok": True, "ready": pools_ready(), **counters()})
+    except Exception:
+        return jsonify({"ok": False, "ready": pools_ready(), **counters()}), 500
+
+
+@app.get("/readyz")
+async def readyz():
+    """200 once every pool lane is warm (hot statements prepared), else 503."""
+    if pools_ready():
+        return jsonify({"ready": True})
+    return jsonify({"ready": False}), 503
+
+
+@app.get("/live_aircraft")
+async def live_aircraft():
+    """Return latest aircraft state for markers + sidebar (?format= as Flask API)."""
+    rows = await fetchall("live", LIVE_AIRCRAFT_SQL)
+
+    fmt = live_format(request.args.get("format"), request.headers.get("Accept"))
+    if fmt == "binary":
+        resp = Response(live_aircraft_binary(rows), mimetype=BINARY_MIME)
+    elif fmt == "columns":
+        resp = jsonify(live_aircraft_columns(rows))
+        resp.mimetype = COLUMNS_MIME
+    else:
+        resp = jsonify(live_aircraft_payload(rows))
+
+    resp.vary.add("Accept")
+    return resp
+
+
+@app.get("/live_paths")
+async def live_paths():
+    """Return current live flight paths as GeoJSON FeatureCollection."""
+    rows = await fetchall("live", LIVE_PATHS_SQL)
+    return await snapshot_response("live_paths", snapshots.dumps(live_paths_payload(rows)))
+
+
+@app.get("/paths_since_midnight")
+async def paths_since_midnight():
+    """Return all aircraft paths that overlap today (since midnight) as GeoJSON."""
+    rows = await fetchall("history", PATHS_SINCE_MIDNIGHT_SQL)
+    return await snapshot_response(
+        "paths_since_midnight", snapshots.dumps(paths_since_midnight_payload(rows))
+    )
+
+
+@app.get("/stats")
+async def stats():
+    row = await fetchone("history", STATS_SQL)
+    return await snapshot_response("stats", snapshots.dumps(stats_payload(row)))
+
+
+@app.get("/coverage")
+async def coverage():
+    """Receiver coverage grid + range polygon as GeoJSON (precomputed by ingest)."""
+    async with connection("history") as conn:
+        async with conn.cursor() as cur:
+            # One snapshot for both reads: the ingest worker rewrites state
+            # and cells in one transaction
+            await cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            await cur.execute(COVERAGE_STATE_SQL, prepare=True)
+            state = await cur.fetchone()
+            await cur.execute(COVERAGE_CELLS_SQL, prepare=True)
+            rows = await cur.fetchall()
+
+    return await snapshot_response("coverage", snapshots.dumps(coverage_payload(state, rows)))
+
+
+@app.get("/aircraft/<hex>")
+async def aircraft_detail(hex):
+    """Return registry + live data for a single aircraft."""
+    params = {"hex": hex.lower()}
+
+    row = await fetchone("live", AIRCRAFT_DETAIL_LIVE_SQL, params)
+    if row is None:
+        # Not live — fall back to path tables + registry (see Flask API)
+        row = await fetchone("live", AIRCRAFT_DETAIL_FALLBACK_SQL, params)
+
+    if row is None:
+        return jsonify({"error": "not found"}), 404
+
+    return jsonify(aircraft_detail_payload(row))
+
+
+@app.get("/playback")
+async def playback():
+    """Stream time-bucketed aircraft states as NDJSON (?from=&to=&step=&bbox=)."""
+    try:
+        params = playback_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    async def generate():
+        # Server-side cursor, see Flask API
+        async with connection("playback") as conn:
+            async with conn.cursor(name="playback") as cur:
+                cur.itersize = PLAYBACK_FETCH_ROWS
+                await cur.execute(PLAYBACK_SQL, params)
+                first = await cur.fetchmany(PLAYBACK_FETCH_ROWS)
+                yield None  # primed: connection held, query running
+
+                yield playback_meta(params)
+
+                buckets = PlaybackBuckets(params)
+                for row in first:
+                    line = buckets.feed(row)
+                    if line:
+                        yield line
+                async for row in cur:
+                    line = buckets.feed(row)
+                    if line:
+                        yield line
+
+                line = buckets.flush()
+                if line:
+                    yield line
+
+    # Connection + first FETCH before the response starts: errors stay 503
+    lines = generate()
+    await anext(lines)
+    return Response(lines, mimetype=PLAYBACK_MIME)
@@ -3,42 +3,128 @@ Flask API for ADS-B live data.
 
 Production notes:
 - Uses psycopg_pool.ConnectionPool (safe for gunicorn workers)
-- Do NOT run gunicorn with --preload when using a pool created at import time.
-  (Default is no preload, which is what you want.)
+- Pools are created closed at import and opened + warmed after fork by the
+  gunicorn hook in gunicorn_conf.py (or lazily on the first request when
+  run without it). /readyz answers 503 until the pools are warm.
+- SQL and JSON shaping live in api_queries.py (shared with the async API,
+  aircraft_digest_async.py)
+- One pool per lane (live / history / playback / health) with its own
+  statement_timeout, see api_db.py. Exhausted pools and timed-out queries
+  answer 503 fast.
+- Snapshot routes are served precompressed (gzip/brotli) with ETags,
+  see api_snapshots.py.
 """
 
-import json
-import os
-import time
-from flask import Flask, jsonify
-from psycopg.rows import tuple_row
-from psycopg_pool import ConnectionPool
+import threading
+from contextlib import contextmanager
+from itertools import chain
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+from psycopg.errors import QueryCanceled
+from psycopg_pool import ConnectionPool, PoolTimeout
+
+from src import api_snapshots as snapshots
+from src.api_db import (
+    LANES,
+    PLAYBACK_FETCH_ROWS,
+    POOL_TIMEOUT_SECONDS,
+    DatabaseUnavailable,
+    PoolExhausted,
+    count_statement_timeout,
+    counters,
+    lent,
+    pool_args,
+    pool_timeout_error,
+    pools_ready,
+    wait_pools_ready,
+    warm_connection,
+)
+from src.api_queries import (
+    AIRCRAFT_DETAIL_FALLBACK_SQL,
+    AIRCRAFT_DETAIL_LIVE_SQL,
+    BINARY_MIME,
+    COLUMNS_MIME,
+    COVERAGE_CELLS_SQL,
+    COVERAGE_STATE_SQL,
+    LIVE_AIRCRAFT_SQL,
+    LIVE_PATHS_SQL,
+    PATHS_SINCE_MIDNIGHT_SQL,
+    PLAYBACK_MIME,
+    PLAYBACK_SQL,
+    STATS_SQL,
+    PlaybackBuckets,
+    aircraft_detail_payload,
+    coverage_payload,
+    live_aircraft_binary,
+    live_aircraft_columns,
+    live_aircraft_payload,
+    live_format,
+    live_paths_payload,
+    paths_since_midnight_payload,
+    playback_meta,
+    playback_params,
+    stats_payload,
+)
 
 app = Flask(__name__)
 
 # ------------------------------------------------------------
-# DB pool (env provided by systemd EnvironmentFile)
+# DB pools (env provided by systemd EnvironmentFile)
 # ------------------------------------------------------------
 
-PGDATABASE = os.environ["PGDATABASE"]
-PGUSER = os.environ["PGUSER"]
-PGPASSWORD = os.environ["PGPASSWORD"]
-PGHOST = os.environ.get("PGHOST", "localhost")
-PGPORT = os.environ.get("PGPORT", "5432")
-PGSSLMODE = os.environ.get("PGSSLMODE", "prefer")  # optional
-
-CONNINFO = (
-    f"dbname={PGDATABASE} user={PGUSER} password={PGPASSWORD} "
-    f"host={PGHOST} port={PGPORT} sslmode={PGSSLMODE}"
-)
+# Created closed, so importing (and gunicorn --preload) opens no sockets
+pools = {
+    lane: ConnectionPool(**pool_args(lane, warm_connection(lane)))
+    for lane in LANES
+}
+_pools_open = False
+_pools_lock = threading.Lock()
+
+
+def open_pools(wait=True):
+    """
+    Open every lane's pool in this process (after fork). With wait=True,
+    block until each lane holds its warmed connections or
+    POOL_WARM_TIMEOUT_SECONDS passes.
+    """
+    global _pools_open
+    with _pools_lock:
+        if not _pools_open:
+            for p in pools.values():
+                p.open(wait=False)
+            _pools_open = True
+
+    if wait and not wait_pools_ready():
+        app.logger.warning("pools not warm after timeout, serving anyway")
+
+
+@contextmanager
+def connection(lane):
+    """Borrow a connection from `lane`, failing fast when the lane is full."""
+    if not _pools_open:
+        open_pools(wait=False)
+    try:
+        with pools[lane].connection(timeout=POOL_TIMEOUT_SECONDS) as conn:
+            with lent(lane):
+                yield conn
+    except PoolTimeout:
+        raise pool_timeout_error(lane, pools[lane]) from None
+    except QueryCanceled:
+        count_statement_timeout(lane)
+        raise
+
+
+def snapshot_response(key, body, mimetype="application/json", vary=()):
+    """Serve `body` precompressed per Accept-Encoding, 304 on a matching ETag."""
+    body, status, headers = snapshots.respond(
+        key,
+        body,
+        request.headers.get("Accept-Encoding"),
+        request.headers.get("If-None-Match"),
+        vary,
+    )
+    return Response(body, status=status, headers=headers, mimetype=mimetype)
 
-# Create pool per-process (works correctly with gunicorn default: no --preload)
-pool = ConnectionPool(
-    conninfo=CONNINFO,
-    min_size=1,
-    max_size=10,
-    kwargs={"row_factory": tuple_row},
-)
 
 # ------------------------------------------------------------
 # Routes
@@ -51,371 +137,178 @@ def handle_error(e):
     return jsonify({"error": "internal server error"}), 500
 
 
+@app.errorhandler(PoolExhausted)
+def handle_pool_exhausted(e):
+    app.logger.warning("%s", e)
+    return jsonify({"error": "busy"}), 503, {"Retry-After": "1"}
+
+
+@app.errorhandler(DatabaseUnavailable)
+def handle_db_unavailable(e):
+    app.logger.warning("%s", e)
+    return jsonify({"error": "database unavailable"}), 503, {"Retry-After": "5"}
+
+
+@app.errorhandler(QueryCanceled)
+def handle_statement_timeout(e):
+    app.logger.warning("Statement timeout: %s", e)
+    return jsonify({"error": "query timeout"}), 503, {"Retry-After": "5"}
+
+
 @app.get("/healthz")
 def healthz():
-    # Lightweight DB check
+    # Lightweight DB check on the reserved health lane
     try:
-        with pool.connection() as conn:
+        with connection("health") as conn:
             with conn.cursor() as cur:
-                cur.execute("SELECT 1;")
+                cur.execute("SELECT 1;", prepare=True)
                 cur.fetchone()
-        return jsonify({"ok": True})
+        return jsonify({"ok": True, "ready": pools_ready(), **counters()})
     except Exception:
-        return jsonify({"ok": False}), 500
+        return jsonify({"ok": False, "ready": pools_ready(), **counters()}), 500
+
+
+@app.get("/readyz")
+def readyz():
+    """200 once every pool lane is warm (hot statements prepared), else 503."""
+    if not _pools_open:
+        open_pools(wait=False)
+    if pools_ready():
+        return jsonify({"ready": True})
+    return jsonify({"ready": False}), 503
 
 
 @app.get("/live_aircraft")
 def live_aircraft():
-    """Return latest aircraft state for markers + sidebar."""
-    with pool.connection() as conn:
+    """Return latest aircraft state for markers + sidebar.
+
+    Opt-in compact formats via ?format=columns|binary or Accept
+    (see api_queries.py for the layouts).
+    """
+    with connection("live") as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                  a.hex,
-                  a.flight,
-                  a.category,
-                  a.lat,
-                  a.lon,
-                  a.alt_baro,
-                  a.track,
-                  EXTRACT(EPOCH FROM a.last_seen) AS last_seen_epoch,
-                  p.total_length_km
-                FROM public.aircraft_live a
-                LEFT JOIN public.aircraft_paths_live p
-                  ON p.hex = a.hex
-                 AND p.flight = a.flight
-                WHERE a.last_seen > now() - interval '60 seconds'
-                ORDER BY a.last_seen DESC;
-                """
-            )
-
-            aircraft = []
-            for hex_, flight, category, lat, lon, alt_baro, track, last_seen_epoch, total_length_km in cur.fetchall():
-                aircraft.append(
-                    {
-                        "hex": hex_,
-                        "flight": (flight or "").strip(),
-                        "category": category,
-                        "lat": lat,
-                        "lon": lon,
-                        "alt_baro": alt_baro,
-                        "track": track,
-                        "last_seen": last_seen_epoch,
-                        "total_length_km": total_length_km,
-                    }
-                )
-
-    return jsonify({"generated_at": time.time(), "aircraft": aircraft})
+            cur.execute(LIVE_AIRCRAFT_SQL, prepare=True)
+            rows = cur.fetchall()
+
+    fmt = live_format(request.args.get("format"), request.headers.get("Accept"))
+    if fmt == "binary":
+        resp = Response(live_aircraft_binary(rows), mimetype=BINARY_MIME)
+    elif fmt == "columns":
+        resp = jsonify(live_aircraft_columns(rows))
+        resp.mimetype = COLUMNS_MIME
+    else:
+        resp = jsonify(live_aircraft_payload(rows))
+
+    resp.vary.add("Accept")
+    return resp
 
 
 @app.get("/live_paths")
 def live_paths():
     """Return current live flight paths as GeoJSON FeatureCollection."""
-    with pool.connection() as conn:
+    with connection("live") as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                  hex,
-                  flight,
-                  category,
-                  ST_AsGeoJSON(geom) AS geom
-                FROM public.aircraft_paths_live;
-                """
-            )
-
-            features = []
-            for hex_, flight, category, geom_json in cur.fetchall():
-                if not geom_json:
-                    continue
-
-                features.append(
-                    {
-                        "type": "Feature",
-                        "properties": {
-                            "hex": hex_,
-                            "flight": (flight or "").strip(),
-                            "category": category,
-                        },
-                        "geometry": json.loads(geom_json),
-                    }
-                )
-
-    return jsonify({"type": "FeatureCollection", "features": features})
+            cur.execute(LIVE_PATHS_SQL, prepare=True)
+            rows = cur.fetchall()
+
+    return snapshot_response("live_paths", snapshots.dumps(live_paths_payload(rows)))
 
 
 @app.get("/paths_since_midnight")
 def paths_since_midnight():
     """Return all aircraft paths that overlap today (since midnight) as GeoJSON."""
-    with pool.connection() as conn:
+    with connection("history") as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                WITH midnight AS (
-                  SELECT date_trunc('day', now()) AS t0
-                ),
-                src AS (
-                  -- archived paths that overlap today
-                  SELECT
-                    hex,
-                    flight,
-                    category,
-                    start_time,
-                    end_time,
-                    geom
-                  FROM public.aircraft_paths_history, midnight
-                  WHERE end_time >= midnight.t0
-
-                  UNION ALL
-
-                  -- live paths that overlap today
-                  SELECT
-                    hex,
-                    flight,
-                    category,
-                    start_time,
-                    now() AS end_time,
-                    geom
-                  FROM public.aircraft_paths_live, midnight
-                  WHERE last_seen >= midnight.t0
-                )
-                SELECT
-                  hex,
-                  flight,
-                  category,
-                  MIN(start_time) AS start_time,
-                  MAX(end_time)   AS end_time,
-                  CASE
-                    WHEN COUNT(geom) = 0 THEN NULL
-                    ELSE ST_AsGeoJSON(ST_LineMerge(ST_Collect(geom)))
-                  END AS geom,
-                  CASE
-                    WHEN COUNT(geom) = 0 THEN NULL
-                    ELSE ROUND((ST_Length(ST_LineMerge(ST_Collect(geom))::geography) / 1000.0)::numeric, 1)::double precision
-                  END AS total_length_km
-                FROM src
-                GROUP BY hex, flight, category
-                ORDER BY MAX(end_time) DESC;
-                """
-            )
-
-            features = []
-            for hex_, flight, category, start_time, end_time, geom_json, total_length_km in cur.fetchall():
-                features.append(
-                    {
-                        "type": "Feature",
-                        "properties": {
-                            "hex": hex_,
-                            "flight": (flight or "").strip(),
-                            "category": category,
-                            "start_time": start_time.isoformat() if start_time else None,
-                            "end_time": end_time.isoformat() if end_time else None,
-                            "total_length_km": total_length_km,
-                        },
-                        "geometry": json.loads(geom_json) if geom_json else None,
-                    }
-                )
-
-    return jsonify({"type": "FeatureCollection", "features": features})
+            cur.execute(PATHS_SINCE_MIDNIGHT_SQL, prepare=True)
+            rows = cur.fetchall()
+
+    return snapshot_response(
+        "paths_since_midnight", snapshots.dumps(paths_since_midnight_payload(rows))
+    )
 
 
 @app.get("/stats")
 def stats():
-    with pool.connection() as conn:
+    with connection("history") as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                WITH t AS (
-                  SELECT
-                    date_trunc('day',  now()) AS day0,
-                    date_trunc('week', now()) AS week0,
-                    now() - interval '1 hour' AS hour0
-                ),
-                src AS (
-                  SELECT
-                    hex,
-                    flight,
-                    category,
-                    start_time,
-                    end_time
-                  FROM public.aircraft_paths_history
-
-                  UNION ALL
-
-                  SELECT
-                    p.hex,
-                    p.flight,
-                    p.category,
-                    p.start_time,
-                    p.last_seen AS end_time
-                  FROM public.aircraft_paths_live p
-                  WHERE p.last_seen > now() - interval '60 seconds'
-                ),
-                grouped AS (
-                  SELECT
-                    hex,
-                    flight,
-                    category,
-                    MIN(start_time) AS start_time,
-                    MAX(end_time)   AS end_time
-                  FROM src
-                  GROUP BY hex, flight, category
-                )
-                SELECT
-                  (SELECT COUNT(*) FROM public.aircraft_paths_history) AS total,
-                  COUNT(*) FILTER (WHERE end_time >= (SELECT week0 FROM t)) AS week,
-                  COUNT(*) FILTER (WHERE end_time >= (SELECT day0  FROM t)) AS today,
-                  COUNT(*) FILTER (WHERE end_time >= (SELECT hour0 FROM t)) AS hour,
-                  MAX(end_time) AS last_flight_at
-                FROM grouped;
-                """
-            )
-
-            total, week, today, hour, last_flight_at = cur.fetchone()
-
-    return jsonify(
-        {
-            "total": int(total or 0),
-            "week": int(week or 0),
-            "today": int(today or 0),
-            "hour": int(hour or 0),
-            "last_flight_at": last_flight_at.isoformat() if last_flight_at else None,
-        }
-    )
+            cur.execute(STATS_SQL, prepare=True)
+            row = cur.fetchone()
+
+    return snapshot_response("stats", snapshots.dumps(stats_payload(row)))
+
+
+@app.get("/coverage")
+def coverage():
+    """Receiver coverage grid + range polygon as GeoJSON (precomputed by ingest)."""
+    with connection("history") as conn:
+        with conn.cursor() as cur:
+            # One snapshot for both reads: the ingest worker rewrites state
+            # and cells in one transaction
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            cur.execute(COVERAGE_STATE_SQL, prepare=True)
+            state = cur.fetchone()
+            cur.execute(COVERAGE_CELLS_SQL, prepare=True)
+            rows = cur.fetchall()
+
+    return snapshot_response("coverage", snapshots.dumps(coverage_payload(state, rows)))
 
 
 @app.get("/aircraft/<hex>")
 def aircraft_detail(hex):
     """Return registry + live data for a single aircraft."""
-    with pool.connection() as conn:
+    with connection("live") as conn:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                    l.hex,
-                    l.flight,
-                    l.category,
-                    l.lat,
-                    l.lon,
-                    l.alt_baro,
-                    l.track,
-                    l.last_seen,
-                    l.data,
-                    r.registration,
-                    r.manufacturername,
-                    r.model,
-                    r.typecode,
-                    r.operator,
-                    r.operatorcallsign,
-                    r.operatoricao,
-                    r.owner,
-                    r.country,
-                    r.serialnumber,
-                    r.built,
-                    r.engines,
-                    c.description_en,
-                    c.description_is
-                FROM public.aircraft_live l
-                LEFT JOIN aircraft_registry r ON r.icao24 = l.hex
-                LEFT JOIN aircraft_categories c ON c.code = l.category
-                WHERE l.hex = %(hex)s
-                """,
-                {"hex": hex.lower()},
-            )
+            cur.execute(AIRCRAFT_DETAIL_LIVE_SQL, {"hex": hex.lower()}, prepare=True)
             row = cur.fetchone()
 
     if row is None:
         # Aircraft not in live table — look up category from path tables,
         # then optionally enrich with registry. Start from history so we
         # always get a row even if the hex is not in the registry.
-        with pool.connection() as conn:
+        with connection("live") as conn:
             with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    WITH src AS (
-                        SELECT hex, flight, category, end_time
-                        FROM public.aircraft_paths_history
-                        WHERE hex = %(hex)s
-
-                        UNION ALL
-
-                        SELECT hex, flight, category, last_seen AS end_time
-                        FROM public.aircraft_paths_live
-                        WHERE hex = %(hex)s
-                    ),
-                    best AS (
-                        SELECT DISTINCT ON (hex) hex, flight, category
-                        FROM src
-                        ORDER BY hex,
-                                end_time DESC NULLS LAST  -- most recent flight wins
-                    )
-                    SELECT
-                        best.hex,
-                        best.flight,
-                        best.category,
-                        NULL::double precision  AS lat,
-                        NULL::double precision  AS lon,
-                        NULL::text              AS alt_baro,
-                        NULL::double precision  AS track,
-                        NULL::timestamptz       AS last_seen,
-                        NULL::jsonb             AS data,
-                        r.registration,
-                        r.manufacturername,
-                        r.model,
-                        r.typecode,
-                        r.operator,
-                        r.operatorcallsign,
-                        r.operatoricao,
-                        r.owner,
-                        r.country,
-                        r.serialnumber,
-                        r.built,
-                        r.engines,
-                        c.description_en,
-                        c.description_is
-                    FROM best
-                    LEFT JOIN aircraft_registry r ON r.icao24 = best.hex
-                    LEFT JOIN aircraft_categories c ON c.code = best.category
-                    """,
-                    {"hex": hex.lower()},
-                )
+                cur.execute(AIRCRAFT_DETAIL_FALLBACK_SQL, {"hex": hex.lower()}, prepare=True)
                 row = cur.fetchone()
 
     if row is None:
         return jsonify({"error": "not found"}), 404
 
-    (
-        hex_, flight, category, lat, lon, alt_baro, track, last_seen, data,
-        registration, manufacturername, model, typecode, operator,
-        operatorcallsign, operatoricao, owner, country, serialnumber,
-        built, engines, description_en, description_is,
-    ) = row
-
-    return jsonify({
-        "hex": hex_,
-        "flight": (flight or "").strip(),
-        "category": category,
-        "category_en": description_en,
-        "category_is": description_is,
-        "lat": lat,
-        "lon": lon,
-        "alt_baro": alt_baro,
-        "track": track,
-        "last_seen": last_seen.isoformat() if last_seen else None,
-        "registration": registration,
-        "manufacturername": manufacturername,
-        "model": model,
-        "typecode": typecode,
-        "operator": operator,
-        "operatorcallsign": operatorcallsign,
-        "operatoricao": operatoricao,
-        "owner": owner,
-        "country": country,
-        "serialnumber": serialnumber,
-        "built": str(built) if built else None,
-        "engines": engines,
-        "gs": data.get("gs") if data else None,
-        "rssi": data.get("rssi") if data else None,
-        "squawk": data.get("squawk") if data else None,
-    })
+    return jsonify(aircraft_detail_payload(row))
+
+
+@app.get("/playback")
+def playback():
+    """Stream time-bucketed aircraft states as NDJSON (?from=&to=&step=&bbox=)."""
+    try:
+        params = playback_params(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        # Server-side cursor: rows come in observed_at order, itersize at a time,
+        # so memory stays flat whatever the window size
+        with connection("playback") as conn:
+            with conn.cursor(name="playback") as cur:
+                cur.itersize = PLAYBACK_FETCH_ROWS
+                cur.execute(PLAYBACK_SQL, params)
+                first = cur.fetchmany(PLAYBACK_FETCH_ROWS)
+                yield None  # primed: connection held, query running
+
+                yield playback_meta(params)
+
+                buckets = PlaybackBuckets(params)
+                for row in chain(first, cur):
+                    line = buckets.feed(row)
+                    if line:
+                        yield line
+
+                line = buckets.flush()
+                if line:
+                    yield line
+
+    # Borrow the connection and run the first FETCH before the response
+    # starts, so a full lane, a statement timeout or a DB error answers 503
+    # instead of a truncated 200
+    lines = generate()
+    next(lines)
+    return Response(stream_with_context(lines), mimetype=PLAYBACK_MIME)
@@ -9,15 +9,31 @@ Updates in this version:
 - Avoids f-string SQL for time intervals (uses make_interval params)
 - Safer "archived count" reporting (uses RETURNING + fetchall)
 - Keeps behavior: tracks aircraft even with no position; only appends geom when position is fresh
+- Multiple receivers (ADSB_SOURCES): one reader thread per source, observations
+  merged per hex before writing so DB load does not scale with receiver count
+- Local spool (ingest_spool.py): every tick is spooled first and a flusher
+  drains it into Postgres, so DB outages cause catch-up instead of gaps.
+  All timestamps come from the tick's capture time, not the DB's now().
+- Receiver coverage: new position rows are binned incrementally into a polar
+  grid (receiver_coverage) every COVERAGE_EVERY_SECONDS, served by /coverage.
+- Compaction: closed days of aircraft_positions_history are folded into
+  encoded per-flight tracks (aircraft_tracks_compact), one day per run.
+- Aircraft records (aircraft_model.py): each dump1090 dict is parsed once in
+  its reader thread and its `data` JSON is serialized once per tick.
 """
 
 import json
 import os
+import threading
 import time
+import urllib.request
 from pathlib import Path
 
 import psycopg
-from psycopg import OperationalError
+from psycopg import DataError, OperationalError
+
+from aircraft_model import Aircraft, escape, unescape
+from ingest_spool import Spool
 
 # ============================================================
 # CONFIG – SINGLE SOURCE OF TRUTH
@@ -40,6 +56,42 @@ MIN_DISTANCE_KM = float(os.environ.get("MIN_DISTANCE_KM", "0.5"))
 DEFAULT_DATA_FILE = Path.cwd() / "web" / "static" / "data" / "aircraft.json"
 DATA_FILE = Path(os.environ.get("ADSB_DATA_FILE", str(DEFAULT_DATA_FILE)))
 
+# --- Receivers ---
+# Comma separated list of "name=location" where location is a file path or an
+# http(s) URL to a dump1090 aircraft.json, e.g.
+#   ADSB_SOURCES=roof=/run/dump1090/aircraft.json,shed=http://pi-shed:8080/data/aircraft.json
+# When unset, DATA_FILE is the single source named "local".
+ADSB_SOURCES = os.environ.get("ADSB_SOURCES", "")
+
+# Snapshots older than this are ignored when merging (receiver offline/stuck)
+SOURCE_STALE_SECONDS = int(os.environ.get("SOURCE_STALE_SECONDS", str(POLL_SECONDS * 3)))
+SOURCE_HTTP_TIMEOUT = float(os.environ.get("SOURCE_HTTP_TIMEOUT", "5"))
+
+# --- Local spool (survives Postgres outages / restarts) ---
+DEFAULT_SPOOL_FILE = Path.cwd() / "var" / "ingest_spool.sqlite3"
+SPOOL_FILE = Path(os.environ.get("INGEST_SPOOL_FILE", str(DEFAULT_SPOOL_FILE)))
+SPOOL_MAX_MB = int(os.environ.get("SPOOL_MAX_MB", "512"))
+# Ticks written to Postgres per transaction when catching up
+SPOOL_FLUSH_BATCH = int(os.environ.get("SPOOL_FLUSH_BATCH", "50"))
+
+# --- Receiver coverage (polar grid around the antenna) ---
+RECEIVER_LAT = float(os.environ.get("RECEIVER_LAT", "64.1051092"))
+RECEIVER_LON = float(os.environ.get("RECEIVER_LON", "-22.018843"))
+COVERAGE_BEARING_STEP_DEG = float(os.environ.get("COVERAGE_BEARING_STEP_DEG", "5"))
+COVERAGE_RANGE_STEP_KM = float(os.environ.get("COVERAGE_RANGE_STEP_KM", "10"))
+# Positions further out than this are treated as bad decodes
+COVERAGE_MAX_RANGE_KM = float(os.environ.get("COVERAGE_MAX_RANGE_KM", "500"))
+COVERAGE_EVERY_SECONDS = int(os.environ.get("COVERAGE_EVERY_SECONDS", "60"))
+COVERAGE_BATCH_ROWS = int(os.environ.get("COVERAGE_BATCH_ROWS", "50000"))
+
+# --- Position history compaction (aircraft_tracks_compact) ---
+# Whole days older than today minus COMPACT_KEEP_DAYS are folded into one
+# encoded row per (hex, flight) segment; 0 disables compaction
+COMPACT_KEEP_DAYS = int(os.environ.get("COMPACT_KEEP_DAYS", "1"))
+# A gap longer than this starts a new segment for the same (hex, flight)
+COMPACT_GAP_SECONDS = int(os.environ.get("COMPACT_GAP_SECONDS", "900"))
+COMPACT_EVERY_SECONDS = int(os.environ.get("COMPACT_EVERY_SECONDS", "3600"))
+
 # --- Database (from systemd EnvironmentFile) ---
 DB_NAME = os.environ["PGDATABASE"]
 DB_USER = os.environ["PGUSER"]
@@ -61,23 +113,144 @@ DB_DSN = (
 # ============================================================
 
 
-def _safe_float(v, default=0.0) -> float:
+def read_aircraft_file(path=DATA_FILE):
     try:
-        return float(v)
-    except Exception:
-        return float(default)
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        return payload.get("aircraft", [])
+    except Exception as e:
+        print("read_aircraft_file failed:", repr(e))
+        return []
 
 
-def read_aircraft_file():
+def read_aircraft_url(url):
     try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            payload = json.load(f)
+        with urllib.request.urlopen(url, timeout=SOURCE_HTTP_TIMEOUT) as resp:
+            payload = json.load(resp)
         return payload.get("aircraft", [])
     except Exception as e:
-        print("read_aircraft_file failed:", repr(e))
+        print(f"read_aircraft_url failed ({url}):", repr(e))
         return []
 
 
+def parse_sources(spec):
+    """
+    Parse ADSB_SOURCES into [(name, location), ...].
+    Entries without "name=" are named after their position (src1, src2, ...).
+    """
+    sources = []
+    for i, entry in enumerate(p.strip() for p in spec.split(",")):
+        if not entry:
+            continue
+        name, sep, location = entry.partition("=")
+        if not sep or "://" in name:
+            name, location = f"src{i + 1}", entry
+        sources.append((name.strip(), location.strip()))
+
+    if not sources:
+        sources.append(("local", str(DATA_FILE)))
+    return sources
+
+
+def read_source(location):
+    if location.startswith(("http://", "https://")):
+        return read_aircraft_url(location)
+    return read_aircraft_file(Path(location))
+
+
+# ============================================================
+# RECEIVERS (one reader thread per source)
+# ============================================================
+
+class SourceReader(threading.Thread):
+    """
+    Polls one receiver every POLL_SECONDS and keeps only its latest snapshot.
+    A slow or dead network feed therefore never delays the other sources
+    or the DB writer.
+    """
+
+    def __init__(self, name, location):
+        super().__init__(name=f"source-{name}", daemon=True)
+        self.source = name
+        self.location = location
+        self._lock = threading.Lock()
+        self._snapshot = ([], 0.0)
+
+    def run(self):
+        while True:
+            # Parsed once here, off the main loop; records drop hex-less objects
+            aircraft_list = [
+                ac for ac in map(Aircraft.from_msg, read_source(self.location))
+                if ac is not None
+            ]
+            with self._lock:
+                self._snapshot = (aircraft_list, time.time())
+            time.sleep(POLL_SECONDS)
+
+    def latest(self):
+        with self._lock:
+            return self._snapshot
+
+
+def merge_observations(snapshots, now=None):
+    """
+    Merge per-source Aircraft records into one record per hex.
+
+    snapshots: [(source, [Aircraft, ...], fetched_at), ...]
+
+    - base record = the source that heard the aircraft most recently
+    - lat/lon/seen_pos = the freshest position from any source
+    - rssi = strongest signal from any source
+    seen/seen_pos are aged by the snapshot's fetch time so receivers polled
+    at different moments compare fairly.
+
+    Returns [(source, Aircraft), ...] where source is the receiver whose data
+    supplied the position (or the base record when there is no position).
+    """
+    now = time.time() if now is None else now
+    merged = {}
+
+    for source, aircraft_list, fetched_at in snapshots:
+        lag = max(0.0, now - fetched_at)
+
+        for ac in aircraft_list:
+            ac = ac.aged(lag)
+
+            cur = merged.get(ac.hex)
+            if cur is None:
+                merged[ac.hex] = [source, ac]
+                continue
+
+            cur_source, cur_ac = cur
+            rssis = [r for r in (cur_ac.rssi, ac.rssi) if r is not None]
+
+            fresher_pos = ac.has_pos and (
+                not cur_ac.has_pos or ac.seen_pos < cur_ac.seen_pos
+            )
+
+            if ac.seen < cur_ac.seen:
+                base, other = ac, cur_ac
+            else:
+                base, other = cur_ac, ac
+
+            out = Aircraft.merged(
+                base,
+                other,
+                pos=ac if fresher_pos else cur_ac,
+                rssi=max(rssis) if rssis else None,
+            )
+
+            if fresher_pos:
+                winner = source
+            elif cur_ac.has_pos:
+                winner = cur_source
+            else:
+                winner = source if base is ac else cur_source
+            merged[ac.hex] = [winner, out]
+
+    return [(source, ac) for source, ac in merged.values()]
+
+
 def connect_db_with_retry():
     """
     Keep trying to connect. systemd will also restart on crash,
@@ -99,157 +272,180 @@ def connect_db_with_retry():
 # DB WRITES
 # ============================================================
 
-def insert_position(cur, msg):
-    lat = msg.get("lat")
-    lon = msg.get("lon")
+# Hot statements: fixed text (no f-string variants), run as prepared
+# statements (cur.execute(..., prepare=True)). psycopg keys a prepared
+# statement on its text *and* parameter types, and None binds untyped
+# while a float binds as float8, so every None/float mix of the nullable
+# floats would be prepared separately. Those go through _float8(): None
+# is sent as NaN and turned back into NULL in SQL (NULLIF), so each
+# statement has one parameter signature and is prepared once per
+# connection. A missing position is handled via %(has_pos)s instead of
+# splicing "NULL" into the text.
 
-    geom_sql = (
-        "ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)"
-        if lat is not None and lon is not None
-        else "NULL"
+NAN = float("nan")
+
+
+def _float8(v):
+    return NAN if v is None else float(v)
+
+
+INSERT_POSITION_SQL = """
+    INSERT INTO public.aircraft_positions_history (
+        hex, flight, observed_at, geom, data, source
     )
+    VALUES (
+        %(hex)s, %(flight)s, to_timestamp(%(observed_at)s),
+        CASE
+          WHEN %(has_pos)s THEN ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)
+        END,
+        %(data)s::jsonb, %(source)s
+    );
+"""
 
+UPSERT_LIVE_AIRCRAFT_SQL = """
+    INSERT INTO public.aircraft_live (
+        hex, flight, category, last_seen,
+        lat, lon, alt_baro, track,
+        gs, baro_rate, pos_seen,
+        geom, data
+    )
+    VALUES (
+        %(hex)s, %(flight)s, %(category)s,
+        to_timestamp(%(observed_at)s) - make_interval(secs => %(seen)s),
+        NULLIF(%(lat)s, 'NaN'::float8), NULLIF(%(lon)s, 'NaN'::float8),
+        %(alt_baro)s, NULLIF(%(track)s, 'NaN'::float8),
+        NULLIF(%(gs)s, 'NaN'::float8), NULLIF(%(baro_rate)s, 'NaN'::float8),
+        CASE
+          WHEN %(has_pos)s THEN to_timestamp(%(observed_at)s) - make_interval(secs => %(seen_pos)s)
+        END,
+        CASE
+          WHEN %(has_pos)s THEN ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)
+        END,
+        %(data)s::jsonb
+    )
+    ON CONFLICT (hex)
+    DO UPDATE SET
+        flight    = EXCLUDED.flight,
+        category  = EXCLUDED.category,
+        last_seen = EXCLUDED.last_seen,
+        lat       = EXCLUDED.lat,
+        lon       = EXCLUDED.lon,
+        alt_baro  = EXCLUDED.alt_baro,
+        track     = EXCLUDED.track,
+        gs        = EXCLUDED.gs,
+        baro_rate = EXCLUDED.baro_rate,
+        pos_seen  = EXCLUDED.pos_seen,
+        geom      = EXCLUDED.geom,
+        data      = EXCLUDED.data;
+"""
+
+UPSERT_LIVE_PATH_SQL = """
+    INSERT INTO public.aircraft_paths_live (
+        hex, flight, category,
+        start_time, last_seen, geom
+    )
+    VALUES (
+        %(hex)s, %(flight)s, %(category)s,
+        to_timestamp(%(observed_at)s),
+        to_timestamp(%(observed_at)s) - make_interval(secs => %(seen)s),
+        CASE
+          WHEN %(can_use_pos)s THEN
+            ST_SetSRID(
+              ST_MakeLine(ARRAY[ST_MakePoint(%(lon)s, %(lat)s)]),
+              4326
+            )
+          ELSE NULL
+        END
+    )
+    ON CONFLICT (hex, flight)
+    DO UPDATE SET
+        category  = EXCLUDED.category,
+        last_seen = EXCLUDED.last_seen,
+        geom = CASE
+          -- no usable position this tick -> keep existing geom as-is
+          WHEN NOT %(can_use_pos)s THEN aircraft_paths_live.geom
+
+          -- first usable position for this row -> start the line
+          WHEN aircraft_paths_live.geom IS NULL THEN
+            ST_SetSRID(
+              ST_MakeLine(ARRAY[ST_MakePoint(%(lon)s, %(lat)s)]),
+              4326
+            )
+
+          -- otherwise append point
+          ELSE
+            ST_AddPoint(
+              aircraft_paths_live.geom,
+              ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)
+            )
+        END;
+"""
+
+
+def insert_position(cur, ac, observed_at, source=None):
     cur.execute(
-        f"""
-        INSERT INTO public.aircraft_positions_history (
-            hex, flight, observed_at, geom, data
-        )
-        VALUES (
-            %(hex)s, %(flight)s, now(), {geom_sql}, %(data)s::jsonb
-        );
-        """,
+        INSERT_POSITION_SQL,
         {
-            "hex": msg.get("hex"),
-            "flight": (msg.get("flight") or "").strip(),
-            "lat": lat,
-            "lon": lon,
-            "data": json.dumps(msg),
+            "hex": ac.hex,
+            "observed_at": observed_at,
+            "source": source,
+            "flight": ac.flight,
+            "has_pos": ac.has_pos,
+            "lat": _float8(ac.lat),
+            "lon": _float8(ac.lon),
+            "data": ac.data_json,
         },
+        prepare=True,
     )
 
 
-def upsert_live_aircraft(cur, msg):
-    hex_ = msg.get("hex")
-    if not hex_:
-        return
-
-    seen = _safe_float(msg.get("seen"), 0.0)
-
+def upsert_live_aircraft(cur, ac, observed_at):
     # Keep aircraft_live strictly "recent"
-    if seen > ARCHIVE_TIMEOUT_SECONDS:
+    if ac.seen > ARCHIVE_TIMEOUT_SECONDS:
         return
 
-    lat = msg.get("lat")
-    lon = msg.get("lon")
-
-    geom_sql = (
-        "ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)"
-        if lat is not None and lon is not None
-        else "NULL"
-    )
-
     cur.execute(
-        f"""
-        INSERT INTO public.aircraft_live (
-            hex, flight, category, last_seen,
-            lat, lon, alt_baro, track,
-            geom, data
-        )
-        VALUES (
-            %(hex)s, %(flight)s, %(category)s,
-            now() - make_interval(secs => %(seen)s),
-            %(lat)s, %(lon)s, %(alt_baro)s, %(track)s,
-            {geom_sql}, %(data)s::jsonb
-        )
-        ON CONFLICT (hex)
-        DO UPDATE SET
-            flight    = EXCLUDED.flight,
-            category  = EXCLUDED.category,
-            last_seen = EXCLUDED.last_seen,
-            lat       = EXCLUDED.lat,
-            lon       = EXCLUDED.lon,
-            alt_baro  = EXCLUDED.alt_baro,
-            track     = EXCLUDED.track,
-            geom      = EXCLUDED.geom,
-            data      = EXCLUDED.data;
-        """,
+        UPSERT_LIVE_AIRCRAFT_SQL,
         {
-            "hex": hex_,
-            "flight": (msg.get("flight") or "").strip(),
-            "category": msg.get("category"),
-            "seen": seen,
-            "lat": lat,
-            "lon": lon,
-            "alt_baro": msg.get("alt_baro"),
-            "track": msg.get("track"),
-            "data": json.dumps(msg),
+            "hex": ac.hex,
+            "has_pos": ac.has_pos,
+            "flight": ac.flight,
+            "category": ac.category,
+            "observed_at": observed_at,
+            "seen": ac.seen,
+            "seen_pos": ac.seen_pos,
+            "lat": _float8(ac.lat),
+            "lon": _float8(ac.lon),
+            # Velocity for client-side dead reckoning
+            "gs": _float8(ac.gs),
+            "baro_rate": _float8(ac.baro_rate),
+            # alt_baro is str or None (both bind untyped, one signature)
+            "alt_baro": ac.alt_baro,
+            "track": _float8(ac.track),
+            "data": ac.data_json,
         },
+        prepare=True,
     )
 
 
-def upsert_live_path(cur, msg):
-    lat = msg.get("lat")
-    lon = msg.get("lon")
-
-    seen = _safe_float(msg.get("seen"), 0.0)
-    seen_pos = _safe_float(msg.get("seen_pos"), 999.0)
-
+def upsert_live_path(cur, ac, observed_at):
     # We ALWAYS upsert the row so "no-position" aircraft are still tracked/archived.
     # But we only touch geom when we have a valid position and it's fresh.
-    has_pos = (lat is not None and lon is not None)
-    can_use_pos = has_pos and (seen_pos <= MAX_SEEN_POS_SECONDS_FOR_LINE)
+    can_use_pos = ac.has_pos and (ac.seen_pos <= MAX_SEEN_POS_SECONDS_FOR_LINE)
 
     cur.execute(
-        """
-        INSERT INTO public.aircraft_paths_live (
-            hex, flight, category,
-            start_time, last_seen, geom
-        )
-        VALUES (
-            %(hex)s, %(flight)s, %(category)s,
-            now(),
-            now() - make_interval(secs => %(seen)s),
-            CASE
-              WHEN %(can_use_pos)s THEN
-                ST_SetSRID(
-                  ST_MakeLine(ARRAY[ST_MakePoint(%(lon)s, %(lat)s)]),
-                  4326
-                )
-              ELSE NULL
-            END
-        )
-        ON CONFLICT (hex, flight)
-        DO UPDATE SET
-            category  = EXCLUDED.category,
-            last_seen = EXCLUDED.last_seen,
-            geom = CASE
-              -- no usable position this tick -> keep existing geom as-is
-              WHEN NOT %(can_use_pos)s THEN aircraft_paths_live.geom
-
-              -- first usable position for this row -> start the line
-              WHEN aircraft_paths_live.geom IS NULL THEN
-                ST_SetSRID(
-                  ST_MakeLine(ARRAY[ST_MakePoint(%(lon)s, %(lat)s)]),
-                  4326
-                )
-
-              -- otherwise append point
-              ELSE
-                ST_AddPoint(
-                  aircraft_paths_live.geom,
-                  ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)
-                )
-            END;
-        """,
+        UPSERT_LIVE_PATH_SQL,
         {
-            "hex": msg.get("hex"),
-            "flight": (msg.get("flight") or "").strip(),
-            "category": msg.get("category"),
-            "lat": lat,
-            "lon": lon,
-            "seen": seen,
+            "hex": ac.hex,
+            "flight": ac.flight,
+            "category": ac.category,
+            "lat": _float8(ac.lat),
+            "lon": _float8(ac.lon),
+            "observed_at": observed_at,
+            "seen": ac.seen,
             "can_use_pos": bool(can_use_pos),
         },
+        prepare=True,
     )
 
 
@@ -257,7 +453,9 @@ def upsert_live_path(cur, msg):
 # ARCHIVING / PRUNING (ONE CLOCK)
 # ============================================================
 
-def archive_and_prune(cur):
+def archive_and_prune(cur, now_ts):
+    # now_ts = capture time of the tick just written, so replaying a
+    # spool backlog archives on the data's clock, not the wall clock
     # Archive only stale paths that pass truth policy
     cur.execute(
         """
@@ -276,7 +474,7 @@ def archive_and_prune(cur):
                     ELSE ST_Length(geom::geography) / 1000.0
                 END AS dist_km
             FROM public.aircraft_paths_live
-            WHERE last_seen < now() - make_interval(secs => %(archive_s)s)
+            WHERE last_seen < to_timestamp(%(now)s) - make_interval(secs => %(archive_s)s)
         )
         INSERT INTO public.aircraft_paths_history (
             hex, flight, category, start_time, end_time, geom
@@ -290,6 +488,7 @@ def archive_and_prune(cur):
         RETURNING hex;
         """,
         {
+            "now": now_ts,
             "archive_s": ARCHIVE_TIMEOUT_SECONDS,
             "min_duration_s": MIN_DURATION_SECONDS,
             "min_points": MIN_POINTS,
@@ -304,67 +503,407 @@ def archive_and_prune(cur):
     cur.execute(
         """
         DELETE FROM public.aircraft_paths_live
-        WHERE last_seen < now() - make_interval(secs => %(archive_s)s);
+        WHERE last_seen < to_timestamp(%(now)s) - make_interval(secs => %(archive_s)s);
         """,
-        {"archive_s": ARCHIVE_TIMEOUT_SECONDS},
+        {"now": now_ts, "archive_s": ARCHIVE_TIMEOUT_SECONDS},
     )
 
     # Prune aircraft_live as before
     cur.execute(
         """
         DELETE FROM public.aircraft_live
-        WHERE last_seen < now() - make_interval(secs => %(archive_s)s);
+        WHERE last_seen < to_timestamp(%(now)s) - make_interval(secs => %(archive_s)s);
         """,
-        {"archive_s": ARCHIVE_TIMEOUT_SECONDS},
+        {"now": now_ts, "archive_s": ARCHIVE_TIMEOUT_SECONDS},
     )
 
 
 # ============================================================
-# MAIN LOOP
+# RECEIVER COVERAGE (incremental, watermark on position id)
 # ============================================================
 
-def run():
-    print("DATA_FILE =", DATA_FILE)
-    print("POLL_SECONDS =", POLL_SECONDS)
-    print("ARCHIVE_TIMEOUT_SECONDS =", ARCHIVE_TIMEOUT_SECONDS)
-    print("DB_HOST =", DB_HOST, "DB_PORT =", DB_PORT, "DB_NAME =", DB_NAME, "DB_USER =", DB_USER)
+# Bins the rows of a `src` CTE (km, bearing, rssi) into the grid
+_COVERAGE_BIN_SQL = """
+    INSERT INTO public.receiver_coverage (
+        bearing_bin, range_bin, n, rssi_sum, rssi_n, max_range_km
+    )
+    SELECT
+        floor(bearing / %(bearing_step)s)::int,
+        floor(km / %(range_step)s)::int,
+        count(*),
+        COALESCE(sum(rssi), 0),
+        count(rssi),
+        max(km)
+    FROM src
+    WHERE km <= %(max_range)s
+    GROUP BY 1, 2
+    ON CONFLICT (bearing_bin, range_bin)
+    DO UPDATE SET
+        n            = receiver_coverage.n + EXCLUDED.n,
+        rssi_sum     = receiver_coverage.rssi_sum + EXCLUDED.rssi_sum,
+        rssi_n       = receiver_coverage.rssi_n + EXCLUDED.rssi_n,
+        max_range_km = GREATEST(receiver_coverage.max_range_km, EXCLUDED.max_range_km);
+"""
+
+COVERAGE_SQL = """
+    WITH rx AS (
+        SELECT ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography AS g
+    ),
+    src AS (
+        SELECT
+            ST_Distance(rx.g, p.geom::geography) / 1000.0 AS km,
+            -- azimuth is NULL for a point on top of the receiver
+            COALESCE(degrees(ST_Azimuth(rx.g, p.geom::geography)), 0) AS bearing,
+            (p.data->>'rssi')::double precision AS rssi
+        FROM public.aircraft_positions_history p, rx
+        WHERE p.id > %(after_id)s
+          AND p.id <= %(upto_id)s
+          AND p.geom IS NOT NULL
+    )
+""" + _COVERAGE_BIN_SQL
+
+# Positions that compaction already removed from aircraft_positions_history;
+# only needed when the grid is rebuilt from scratch
+COVERAGE_COMPACT_SQL = """
+    WITH rx AS (
+        SELECT ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326)::geography AS g
+    ),
+    pts AS (
+        SELECT
+            ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326)::geography AS g,
+            p.rssi
+        FROM public.aircraft_tracks_compact c
+        CROSS JOIN LATERAL public.decode_compact_track(c) p
+    ),
+    src AS (
+        SELECT
+            ST_Distance(rx.g, pts.g) / 1000.0 AS km,
+            COALESCE(degrees(ST_Azimuth(rx.g, pts.g)), 0) AS bearing,
+            pts.rssi::double precision AS rssi
+        FROM pts, rx
+    )
+""" + _COVERAGE_BIN_SQL
+
+
+def coverage_params(**extra):
+    return {
+        "lat": RECEIVER_LAT,
+        "lon": RECEIVER_LON,
+        "bearing_step": COVERAGE_BEARING_STEP_DEG,
+        "range_step": COVERAGE_RANGE_STEP_KM,
+        "max_range": COVERAGE_MAX_RANGE_KM,
+        **extra,
+    }
+
+
+def ensure_coverage_state(cur):
+    """
+    Create the coverage_state row, or reset the grid when the receiver
+    location or bin sizes changed (old bins would no longer line up).
+    A fresh grid starts with the compacted days; update_coverage() then
+    rescans aircraft_positions_history from id 0.
+    """
+    cur.execute(
+        """
+        SELECT lat, lon, bearing_step_deg, range_step_km
+        FROM public.coverage_state
+        WHERE id = 1;
+        """
+    )
+    row = cur.fetchone()
+    config = (RECEIVER_LAT, RECEIVER_LON, COVERAGE_BEARING_STEP_DEG, COVERAGE_RANGE_STEP_KM)
+
+    if row is not None and tuple(row) == config:
+        return
+
+    if row is not None:
+        print("[COVERAGE] receiver/bins changed -> rebuilding grid from scratch")
+        cur.execute("DELETE FROM public.receiver_coverage;")
+
+    cur.execute(
+        """
+        INSERT INTO public.coverage_state (
+            id, last_position_id, lat, lon, bearing_step_deg, range_step_km
+        )
+        VALUES (1, 0, %(lat)s, %(lon)s, %(bearing_step)s, %(range_step)s)
+        ON CONFLICT (id)
+        DO UPDATE SET
+            last_position_id = 0,
+            lat              = EXCLUDED.lat,
+            lon              = EXCLUDED.lon,
+            bearing_step_deg = EXCLUDED.bearing_step_deg,
+            range_step_km    = EXCLUDED.range_step_km,
+            updated_at       = now();
+        """,
+        {
+            "lat": RECEIVER_LAT,
+            "lon": RECEIVER_LON,
+            "bearing_step": COVERAGE_BEARING_STEP_DEG,
+            "range_step": COVERAGE_RANGE_STEP_KM,
+        },
+    )
 
+    cur.execute(COVERAGE_COMPACT_SQL, coverage_params())
+    if cur.rowcount > 0:
+        print(f"[COVERAGE] {cur.rowcount} bins from compacted tracks")
+
+
+def update_coverage(cur):
+    """Fold up to COVERAGE_BATCH_ROWS new position rows into the grid."""
+    cur.execute(
+        "SELECT last_position_id FROM public.coverage_state WHERE id = 1 FOR UPDATE;"
+    )
+    (after_id,) = cur.fetchone()
+
+    cur.execute(
+        """
+        SELECT max(id)
+        FROM (
+            SELECT id
+            FROM public.aircraft_positions_history
+            WHERE id > %(after_id)s
+            ORDER BY id
+            LIMIT %(limit)s
+        ) s;
+        """,
+        {"after_id": after_id, "limit": COVERAGE_BATCH_ROWS},
+    )
+    (upto_id,) = cur.fetchone()
+    if upto_id is None:
+        return 0
+
+    cur.execute(COVERAGE_SQL, coverage_params(after_id=after_id, upto_id=upto_id))
+    cur.execute(
+        """
+        UPDATE public.coverage_state
+        SET last_position_id = %(upto_id)s, updated_at = now()
+        WHERE id = 1;
+        """,
+        {"upto_id": upto_id},
+    )
+    return upto_id - after_id
+
+
+# ============================================================
+# POSITION HISTORY COMPACTION (closed days -> encoded tracks)
+# ============================================================
+
+# One statement: the DELETE ... RETURNING feeds the INSERT, so exactly the
+# rows that were folded are removed. Only rows already binned into the
+# coverage grid (id <= watermark) are touched; a grid rebuild re-reads them
+# through COVERAGE_COMPACT_SQL. Rows without a position are dropped; they
+# carry no track. Decode with public.decode_compact_track().
+COMPACT_DAY_SQL = """
+    WITH day AS (
+        SELECT min(observed_at)::date AS d
+        FROM public.aircraft_positions_history
+        WHERE observed_at < date_trunc('day', to_timestamp(%(now)s)::timestamp)
+                            - make_interval(days => %(keep_days)s)
+    ),
+    gone AS (
+        DELETE FROM public.aircraft_positions_history p
+        USING day
+        WHERE p.observed_at >= day.d
+          AND p.observed_at <  day.d + 1
+          AND p.id <= (SELECT last_position_id FROM public.coverage_state WHERE id = 1)
+        RETURNING
+            p.hex,
+            COALESCE(p.flight, '') AS flight,
+            p.source,
+            p.observed_at,
+            p.geom,
+            p.data->>'alt_baro' AS alt_baro,
+            (p.data->>'rssi')::real AS rssi
+    ),
+    marked AS (
+        SELECT
+            *,
+            CASE
+                WHEN observed_at - lag(observed_at) OVER w
+                     > make_interval(secs => %(gap_s)s) THEN 1
+                ELSE 0
+            END AS new_segment
+        FROM gone
+        WHERE geom IS NOT NULL
+        WINDOW w AS (PARTITION BY hex, flight, source ORDER BY observed_at)
+    ),
+    segments AS (
+        SELECT
+            *,
+            sum(new_segment) OVER (
+                PARTITION BY hex, flight, source ORDER BY observed_at
+            ) AS segment
+        FROM marked
+    ),
+    vertices AS (
+        SELECT
+            *,
+            min(observed_at) OVER (PARTITION BY hex, flight, source, segment) AS t0
+        FROM segments
+    )
+    INSERT INTO public.aircraft_tracks_compact (
+        hex, flight, source, start_time, end_time, n_points, path, t_ms, alt_baro, rssi
+    )
+    SELECT
+        hex,
+        flight,
+        source,
+        min(observed_at),
+        max(observed_at),
+        count(*),
+        ST_AsEncodedPolyline(ST_Collect(geom ORDER BY observed_at), 5),
+        array_agg(round(EXTRACT(EPOCH FROM observed_at - t0) * 1000)::integer ORDER BY observed_at),
+        array_agg(alt_baro ORDER BY observed_at),
+        array_agg(rssi ORDER BY observed_at)
+    FROM vertices
+    GROUP BY hex, flight, source, segment
+    RETURNING n_points, start_time::date;
+"""
+
+
+def compact_positions(cur, now_ts):
+    """
+    Fold the oldest closed day of aircraft_positions_history into
+    aircraft_tracks_compact. Returns (points folded, segments written).
+    """
+    cur.execute(
+        COMPACT_DAY_SQL,
+        {"now": now_ts, "keep_days": COMPACT_KEEP_DAYS, "gap_s": COMPACT_GAP_SECONDS},
+    )
+    rows = cur.fetchall()
+    if rows:
+        print(
+            f"[COMPACT] {rows[0][1]}: {sum(n for n, _ in rows)} positions "
+            f"-> {len(rows)} tracks"
+        )
+    return sum(n for n, _ in rows), len(rows)
+
+
+# ============================================================
+# SPOOL FLUSHER
+# ============================================================
+
+def encode_tick(observations):
+    """
+    Spool payload for one tick: one line per aircraft, "source\t" followed by
+    Aircraft.to_line(). Reading it back needs no JSON parsing.
+    """
+    return "\n".join(f"{escape(source or '')}\t{ac.to_line()}" for source, ac in observations)
+
+
+def decode_tick(payload):
+    """Inverse of encode_tick(): [(source, Aircraft), ...]; ValueError if malformed."""
+    if not payload:
+        return []
+
+    # Not splitlines(): it also breaks on \x1c-\x1e, \x85, \u2028, ...
+    observations = []
+    for line in payload.split("\n"):
+        source, _, rest = line.partition("\t")
+        observations.append((unescape(source) or None, Aircraft.from_line(rest)))
+    return observations
+
+
+def write_tick(cur, observed_at, observations):
+    for source, ac in observations:
+        hex_ = ac.hex
+
+        cur.execute("SAVEPOINT sp_aircraft")
+
+        try:
+            insert_position(cur, ac, observed_at, source)
+            upsert_live_aircraft(cur, ac, observed_at)  # writes even if lat/lon missing
+            upsert_live_path(cur, ac, observed_at)      # appends geom only when position is usable
+            cur.execute("RELEASE SAVEPOINT sp_aircraft")
+        except DataError as e:
+            # A bad value in this aircraft's data: roll back only this
+            # aircraft, not the whole tick. Anything else (missing column,
+            # permission, ...) is systemic and propagates, so the batch is
+            # not acked and stays in the spool.
+            print("DB error:", repr(e), "hex=", hex_)
+            cur.execute("ROLLBACK TO SAVEPOINT sp_aircraft")
+            cur.execute("RELEASE SAVEPOINT sp_aircraft")
+            continue
+
+
+def flush_spool_forever(spool):
+    """
+    Drain the spool oldest-first in batches of SPOOL_FLUSH_BATCH ticks.
+    Ticks are acked only after commit; on any error the batch stays in the
+    spool and is retried, so nothing is lost and order is preserved.
+    """
     conn = connect_db_with_retry()
+    coverage_ready = False
+    coverage_next = 0.0
+    compact_next = 0.0
 
     while True:
         try:
-            aircraft_list = read_aircraft_file()
-            print(f"[LOOP] aircraft in JSON: {len(aircraft_list)}")
+            # Coverage runs in its own transaction after spooled ticks are
+            # committed; the single writer makes the id watermark safe.
+            # A coverage failure must never block the spool.
+            if time.time() >= coverage_next:
+                coverage_next = time.time() + COVERAGE_EVERY_SECONDS
+                try:
+                    with conn.cursor() as cur:
+                        if not coverage_ready:
+                            ensure_coverage_state(cur)
+                            coverage_ready = True
+                        update_coverage(cur)
+                        conn.commit()
+                except OperationalError:
+                    raise
+                except Exception as e:
+                    print(f"[COVERAGE] update failed: {repr(e)}")
+                    conn.rollback()
+
+            # Compaction relies on the coverage watermark, so it runs after it
+            if COMPACT_KEEP_DAYS > 0 and coverage_ready and time.time() >= compact_next:
+                compact_next = time.time() + COMPACT_EVERY_SECONDS
+                try:
+                    with conn.cursor() as cur:
+                        compact_positions(cur, time.time())
+                        conn.commit()
+                except OperationalError:
+                    raise
+                except Exception as e:
+                    print(f"[COMPACT] failed: {repr(e)}")
+                    conn.rollback()
+
+            batch = spool.read_batch(SPOOL_FLUSH_BATCH)
+            if not batch:
+                time.sleep(POLL_SECONDS)
+                continue
+
+            ticks = []
+            for tick_id, captured_at, payload in batch:
+                try:
+                    ticks.append((captured_at, decode_tick(payload)))
+                except Exception as e:
+                    # Would fail the same way on every retry and block the spool
+                    print(f"[SPOOL] tick {tick_id} cannot be decoded ({repr(e)}) -> quarantined")
+                    spool.quarantine(tick_id)
 
             with conn.cursor() as cur:
-                for ac in aircraft_list:
-                    hex_ = ac.get("hex")
-                    if not hex_:
-                        # dump1090 sometimes includes objects without hex; skip safely
-                        continue
-
-                    cur.execute("SAVEPOINT sp_aircraft")
-
-                    try:
-                        insert_position(cur, ac)
-                        upsert_live_aircraft(cur, ac)  # writes even if lat/lon missing
-                        upsert_live_path(cur, ac)      # appends geom only when position is usable
-                        cur.execute("RELEASE SAVEPOINT sp_aircraft")
-                    except Exception as e:
-                        print("DB error:", repr(e), "hex=", hex_)
-                        # Roll back only this aircraft, not the whole loop
-                        cur.execute("ROLLBACK TO SAVEPOINT sp_aircraft")
-                        cur.execute("RELEASE SAVEPOINT sp_aircraft")
-                        continue
-
-                archive_and_prune(cur)
+                for captured_at, observations in ticks:
+                    write_tick(cur, captured_at, observations)
+                    # Per tick, on that tick's clock: while catching up, an
+                    # aircraft silent for ARCHIVE_TIMEOUT_SECONDS inside the
+                    # batch must be archived before its next point arrives
+                    archive_and_prune(cur, captured_at)
                 conn.commit()
 
-            time.sleep(POLL_SECONDS)
+            spool.ack(batch[-1][0])
+
+            if len(batch) == SPOOL_FLUSH_BATCH:
+                print(f"[SPOOL] caught up {len(batch)} ticks, {spool.pending()} pending")
+            else:
+                time.sleep(POLL_SECONDS)
 
         except OperationalError as e:
-            # connection dropped -> reconnect and continue
+            # connection dropped -> reconnect; the batch is still in the spool
             print(f"[DB] operational error: {repr(e)}  -> reconnecting")
+            coverage_ready = False
             try:
                 conn.close()
             except Exception:
@@ -373,7 +912,7 @@ def run():
 
         except Exception as e:
             # unexpected error -> rollback current tx, keep running
-            print(f"[LOOP] unexpected error: {repr(e)}")
+            print(f"[SPOOL] unexpected error: {repr(e)}")
             try:
                 conn.rollback()
             except Exception:
@@ -381,5 +920,67 @@ def run():
             time.sleep(1)
 
 
+# ============================================================
+# MAIN LOOP
+# ============================================================
+
+def run():
+    sources = parse_sources(ADSB_SOURCES)
+    print("SOURCES =", ", ".join(f"{n}={loc}" for n, loc in sources))
+    print("POLL_SECONDS =", POLL_SECONDS)
+    print("ARCHIVE_TIMEOUT_SECONDS =", ARCHIVE_TIMEOUT_SECONDS)
+    print("SPOOL_FILE =", SPOOL_FILE, "SPOOL_MAX_MB =", SPOOL_MAX_MB)
+    print("DB_HOST =", DB_HOST, "DB_PORT =", DB_PORT, "DB_NAME =", DB_NAME, "DB_USER =", DB_USER)
+
+    readers = [SourceReader(name, location) for name, location in sources]
+    for reader in readers:
+        reader.start()
+
+    spool = Spool(SPOOL_FILE, SPOOL_MAX_MB * 1024 * 1024)
+    pending = spool.pending()
+    if pending:
+        print(f"[SPOOL] {pending} ticks pending from previous run -> replaying")
+
+    # The flusher owns the DB connection; this loop never touches Postgres
+    threading.Thread(
+        target=flush_spool_forever, args=(spool,), name="spool-flusher", daemon=True
+    ).start()
+
+    # source -> fetched_at of the last snapshot spooled from it
+    last_spooled = {}
+
+    while True:
+        try:
+            now = time.time()
+            snapshots = []
+            for reader in readers:
+                aircraft_list, fetched_at = reader.latest()
+                if now - fetched_at > SOURCE_STALE_SECONDS:
+                    continue
+                # Readers poll on their own cadence; spooling the same snapshot
+                # twice would duplicate history rows, path vertices and coverage
+                if fetched_at <= last_spooled.get(reader.source, 0.0):
+                    continue
+                snapshots.append((reader.source, aircraft_list, fetched_at))
+
+            # Objects without hex (dump1090 sometimes includes them) were
+            # already dropped when the readers built their Aircraft records
+            observations = merge_observations(snapshots, now)
+            print(
+                f"[LOOP] aircraft merged: {len(observations)} "
+                f"from {len(snapshots)}/{len(readers)} sources with a new snapshot"
+            )
+
+            # Empty ticks are spooled too: they drive archiving/pruning
+            spool.append(now, encode_tick(observations))
+            for source, _, fetched_at in snapshots:
+                last_spooled[source] = fetched_at
+
+        except Exception as e:
+            print(f"[LOOP] unexpected error: {repr(e)}")
+
+        time.sleep(POLL_SECONDS)
+
+
 if __name__ == "__main__":
     run()
@@ -0,0 +1,153 @@
+"""
+Normalized aircraft record for the ingest worker.
+
+A dump1090 aircraft dict is parsed and validated ONCE into an Aircraft
+(__slots__, no per-instance dict). The JSON for the `data` columns is
+produced once, when the record is built, and shared by every DB write and
+by the spool.
+"""
+
+import json
+import re
+
+
+def safe_float(v, default=0.0):
+    try:
+        return float(v)
+    except Exception:
+        return default
+
+
+def _opt_float(v):
+    return None if v is None else safe_float(v, None)
+
+
+# Spool lines are split on "\t" and "\n": text fields escape both (and the
+# backslash). Floats and json.dumps() output (ensure_ascii) never contain them.
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+_ESCAPED = re.compile(r"\\(.)", re.S)
+
+
+def escape(text):
+    return text.translate(_ESCAPES)
+
+
+def unescape(text):
+    if "\\" not in text:
+        return text
+    return _ESCAPED.sub(lambda m: _UNESCAPES[m.group(1)], text)
+
+
+def _opt_str(v):
+    return unescape(v) or None
+
+
+# Spool line layout: every slot as text, data_json last
+_LINE_FIELDS = (
+    ("hex", unescape), ("flight", unescape), ("category", _opt_str),
+    ("lat", _opt_float), ("lon", _opt_float), ("alt_baro", _opt_str),
+    ("track", _opt_float), ("gs", _opt_float), ("baro_rate", _opt_float),
+    ("rssi", _opt_float), ("seen", float), ("seen_pos", float),
+)
+
+
+class Aircraft:
+    __slots__ = (
+        "hex", "flight", "category",
+        "lat", "lon", "alt_baro", "track", "gs", "baro_rate",
+        "rssi", "seen", "seen_pos",
+        "data_json",
+    )
+
+    @classmethod
+    def from_msg(cls, msg, data_json=None):
+        """
+        Parse a dump1090 aircraft dict; None when it has no hex.
+        The dict itself is not kept, only its JSON text.
+        """
+        hex_ = msg.get("hex")
+        if not hex_:
+            return None
+
+        ac = cls.__new__(cls)
+        ac.hex = hex_
+        ac.flight = (msg.get("flight") or "").strip()
+        ac.category = msg.get("category")
+        ac.lat = msg.get("lat")
+        ac.lon = msg.get("lon")
+        alt = msg.get("alt_baro")
+        # TEXT column; one stable parameter type for the prepared statements
+        ac.alt_baro = None if alt is None else str(alt)
+        ac.track = _opt_float(msg.get("track"))
+        ac.gs = _opt_float(msg.get("gs"))
+        rate = msg.get("baro_rate")
+        ac.baro_rate = _opt_float(msg.get("geom_rate") if rate is None else rate)
+        ac.rssi = _opt_float(msg.get("rssi"))
+        ac.seen = safe_float(msg.get("seen"), 0.0)
+        ac.seen_pos = safe_float(msg.get("seen_pos"), 999.0)
+        ac.data_json = json.dumps(msg) if data_json is None else data_json
+        return ac
+
+    def to_line(self):
+        """One tab separated line; parsed back without touching the JSON."""
+        values = [getattr(self, name) for name, _ in _LINE_FIELDS]
+        text = "\t".join(
+            "" if v is None else escape(v) if isinstance(v, str) else str(v)
+            for v in values
+        )
+        return f"{text}\t{self.data_json}"
+
+    @classmethod
+    def from_line(cls, line):
+        """Inverse of to_line(); ValueError on a malformed line."""
+        *values, data_json = line.split("\t", len(_LINE_FIELDS))
+        if len(values) != len(_LINE_FIELDS):
+            raise ValueError(f"spool line has {len(values) + 1} of {len(_LINE_FIELDS) + 1} fields")
+        ac = cls.__new__(cls)
+        for (name, parse), value in zip(_LINE_FIELDS, values):
+            setattr(ac, name, parse(value))
+        ac.data_json = data_json
+        return ac
+
+    @property
+    def has_pos(self):
+        return self.lat is not None and self.lon is not None
+
+    def aged(self, seconds):
+        """
+        Copy with seen/seen_pos advanced by `seconds`. data_json keeps the
+        receiver's message as received; the aged values go to the columns.
+        """
+        if not seconds:
+            return self
+
+        ac = Aircraft.__new__(Aircraft)
+        for name in Aircraft.__slots__:
+            setattr(ac, name, getattr(self, name))
+        ac.seen += seconds
+        ac.seen_pos += seconds
+        return ac
+
+    @classmethod
+    def merged(cls, base, other, pos, rssi):
+        """
+        Combine two observations of one hex:
+        base = most recently heard (wins on conflicts), other fills gaps,
+        pos = the one with the freshest position, rssi = best signal.
+        Only hexes heard by several receivers pay for re-parsing the JSON.
+        """
+        msg = json.loads(other.data_json)
+        msg.update(json.loads(base.data_json))
+        if pos.has_pos:
+            msg["lat"] = pos.lat
+            msg["lon"] = pos.lon
+            msg["seen_pos"] = pos.seen_pos
+        msg["seen"] = base.seen
+        if rssi is not None:
+            msg["rssi"] = rssi
+
+        ac = cls.from_msg(msg)
+        ac.seen = base.seen
+        ac.seen_pos = pos.seen_pos if pos.has_pos else base.seen_pos
+        return ac
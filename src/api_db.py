@@ -0,0 +1,282 @@
+"""
+DB settings shared by the Flask API and the async API.
+
+Routes are split into lanes, each with its own pool and server-side
+statement_timeout, so one runaway history query cannot starve the live
+endpoints or /healthz:
+
+  live      /live_aircraft, /live_paths, /aircraft/<hex>
+  history   /paths_since_midnight, /stats, /coverage
+  playback  /playback (holds its connection for the whole stream)
+  health    /healthz (reserved capacity)
+
+When a lane's pool is exhausted the request fails fast with 503
+(POOL_TIMEOUT_SECONDS) instead of queueing until gunicorn's timeout; a
+timeout while the lane still has free slots is reported as the database
+being unavailable, not as exhaustion.
+
+Pools are created closed and opened per worker after fork. Every new
+connection runs and prepares its lane's hot statements (WARM_QUERIES)
+before the pool hands it out, and a worker is "ready" while each lane
+holds its min size of open, warmed connections: connections the pool
+closes (broken, expired) stop counting, so readiness drops with them.
+"""
+
+import logging
+import os
+import threading
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+
+import psycopg
+from psycopg.rows import tuple_row
+
+from src.api_queries import WARM_QUERIES
+
+log = logging.getLogger(__name__)
+
+# ------------------------------------------------------------
+# Connection (env provided by systemd EnvironmentFile)
+# ------------------------------------------------------------
+
+PGDATABASE = os.environ["PGDATABASE"]
+PGUSER = os.environ["PGUSER"]
+PGPASSWORD = os.environ["PGPASSWORD"]
+PGHOST = os.environ.get("PGHOST", "localhost")
+PGPORT = os.environ.get("PGPORT", "5432")
+PGSSLMODE = os.environ.get("PGSSLMODE", "prefer")  # optional
+
+CONNINFO = (
+    f"dbname={PGDATABASE} user={PGUSER} password={PGPASSWORD} "
+    f"host={PGHOST} port={PGPORT} sslmode={PGSSLMODE}"
+)
+
+# Max wait for a pooled connection before answering 503
+POOL_TIMEOUT_SECONDS = float(os.environ.get("POOL_TIMEOUT_SECONDS", "2"))
+
+# Rows per server-side cursor round trip for streamed endpoints (/playback)
+PLAYBACK_FETCH_ROWS = int(os.environ.get("PLAYBACK_FETCH_ROWS", "2000"))
+
+# 0 = no warm-up queries and min_size 1 (the old behaviour, for benchmarks)
+POOL_WARMUP = os.environ.get("POOL_WARMUP", "1") != "0"
+# Max time a booting worker waits for warm pools before serving anyway;
+# keep it below gunicorn's --timeout
+POOL_WARM_TIMEOUT_SECONDS = float(os.environ.get("POOL_WARM_TIMEOUT_SECONDS", "20"))
+
+# ------------------------------------------------------------
+# Lanes: (warm pool size, max pool size, statement_timeout ms)
+# ------------------------------------------------------------
+
+LANES = {
+    "live": (
+        int(os.environ.get("LIVE_POOL_MIN_SIZE", "2")),
+        int(os.environ.get("LIVE_POOL_MAX_SIZE", "6")),
+        int(os.environ.get("LIVE_STATEMENT_TIMEOUT_MS", "2000")),
+    ),
+    "history": (
+        int(os.environ.get("HISTORY_POOL_MIN_SIZE", "1")),
+        int(os.environ.get("HISTORY_POOL_MAX_SIZE", "2")),
+        int(os.environ.get("HISTORY_STATEMENT_TIMEOUT_MS", "15000")),
+    ),
+    "playback": (
+        int(os.environ.get("PLAYBACK_POOL_MIN_SIZE", "1")),
+        int(os.environ.get("PLAYBACK_POOL_MAX_SIZE", "2")),
+        int(os.environ.get("PLAYBACK_STATEMENT_TIMEOUT_MS", "15000")),
+    ),
+    "health": (
+        int(os.environ.get("HEALTH_POOL_MIN_SIZE", "1")),
+        int(os.environ.get("HEALTH_POOL_MAX_SIZE", "1")),
+        int(os.environ.get("HEALTH_STATEMENT_TIMEOUT_MS", "1000")),
+    ),
+}
+
+# A /playback stream keeps its transaction open between FETCHes while the
+# client reads; a client that stalls longer than this loses the stream
+# and the connection goes back to the lane
+IDLE_IN_TRANSACTION_TIMEOUT_MS = {
+    "playback": int(os.environ.get("PLAYBACK_IDLE_TIMEOUT_MS", "30000")),
+}
+
+
+def min_size(lane):
+    warm_size, max_size, _ = LANES[lane]
+    return min(warm_size, max_size) if POOL_WARMUP else 1
+
+
+def pool_args(lane, configure=None):
+    """
+    Keyword arguments for ConnectionPool / AsyncConnectionPool.
+    Pools start closed; the apps open them after fork.
+    """
+    _, max_size, statement_timeout_ms = LANES[lane]
+    options = f"-c statement_timeout={statement_timeout_ms}"
+    if lane in IDLE_IN_TRANSACTION_TIMEOUT_MS:
+        options += (
+            " -c idle_in_transaction_session_timeout="
+            f"{IDLE_IN_TRANSACTION_TIMEOUT_MS[lane]}"
+        )
+    return {
+        "conninfo": CONNINFO,
+        "name": lane,
+        "min_size": min_size(lane),
+        "max_size": max_size,
+        "open": False,
+        "configure": configure,
+        "kwargs": {
+            "row_factory": tuple_row,
+            "options": options,
+        },
+    }
+
+
+# ------------------------------------------------------------
+# Warm-up + readiness
+# ------------------------------------------------------------
+
+_warm_cond = threading.Condition()
+# Warmed connections per lane; a connection the pool discards is closed
+# (or collected) and no longer counts
+_warmed = {lane: weakref.WeakSet() for lane in LANES}
+
+
+def _mark_warmed(lane, conn):
+    with _warm_cond:
+        _warmed[lane].add(conn)
+        _warm_cond.notify_all()
+
+
+def _open_warmed(lane):
+    return sum(1 for conn in list(_warmed[lane]) if not conn.closed)
+
+
+def _all_warm():
+    return all(_open_warmed(lane) >= min_size(lane) for lane in LANES)
+
+
+def pools_ready():
+    with _warm_cond:
+        return _all_warm()
+
+
+def wait_pools_ready(timeout=POOL_WARM_TIMEOUT_SECONDS):
+    """Block until every lane holds its warm connections; False on timeout."""
+    with _warm_cond:
+        return _warm_cond.wait_for(_all_warm, timeout)
+
+
+def warm_connection(lane):
+    """configure= callback for ConnectionPool: run + prepare the hot statements."""
+
+    def configure(conn):
+        if POOL_WARMUP:
+            for sql, params in WARM_QUERIES[lane]:
+                try:
+                    with conn.cursor() as cur:
+                        cur.execute(sql, params, prepare=True)
+                        cur.fetchall()
+                except psycopg.Error as e:
+                    log.warning("warm-up query failed on %s lane: %s", lane, e)
+                # The pool only accepts idle connections
+                conn.rollback()
+        _mark_warmed(lane, conn)
+
+    return configure
+
+
+def async_warm_connection(lane):
+    """configure= callback for AsyncConnectionPool (see warm_connection)."""
+
+    async def configure(conn):
+        if POOL_WARMUP:
+            for sql, params in WARM_QUERIES[lane]:
+                try:
+                    async with conn.cursor() as cur:
+                        await cur.execute(sql, params, prepare=True)
+                        await cur.fetchall()
+                except psycopg.Error as e:
+                    log.warning("warm-up query failed on %s lane: %s", lane, e)
+                await conn.rollback()
+        _mark_warmed(lane, conn)
+
+    return configure
+
+
+# ------------------------------------------------------------
+# Exhaustion accounting
+# ------------------------------------------------------------
+
+
+class PoolExhausted(Exception):
+    """No connection available in `lane` within POOL_TIMEOUT_SECONDS."""
+
+    def __init__(self, lane):
+        super().__init__(f"pool '{lane}' exhausted")
+        self.lane = lane
+
+
+class DatabaseUnavailable(Exception):
+    """`lane` timed out with free slots: Postgres refused or dropped connections."""
+
+    def __init__(self, lane):
+        super().__init__(f"pool '{lane}' cannot reach the database")
+        self.lane = lane
+
+
+# Per-process counters, reported by /healthz
+_counts_lock = threading.Lock()
+pool_exhausted_counts = Counter()
+db_unavailable_counts = Counter()
+statement_timeout_counts = Counter()
+_lent = Counter()
+
+
+@contextmanager
+def lent(lane):
+    """Track a connection borrowed from `lane` for pool_timeout_error()."""
+    with _counts_lock:
+        _lent[lane] += 1
+    try:
+        yield
+    finally:
+        with _counts_lock:
+            _lent[lane] -= 1
+
+
+def pool_timeout_error(lane, pool):
+    """
+    Count a PoolTimeout on `lane` and return the exception to raise.
+
+    Only a lane whose max_size connections are all lent out is exhausted.
+    With a free slot the pool could not open a connection (the pool's
+    connections_errors grows), so Postgres is down or refusing.
+    """
+    _, max_size, _ = LANES[lane]
+    with _counts_lock:
+        n_lent = _lent[lane]
+        exhausted = n_lent >= max_size
+        if exhausted:
+            pool_exhausted_counts[lane] += 1
+        else:
+            db_unavailable_counts[lane] += 1
+    if exhausted:
+        return PoolExhausted(lane)
+    log.warning(
+        "pool '%s' timed out with %d/%d connections lent: %s",
+        lane, n_lent, max_size, pool.get_stats(),
+    )
+    return DatabaseUnavailable(lane)
+
+
+def count_statement_timeout(lane):
+    with _counts_lock:
+        statement_timeout_counts[lane] += 1
+
+
+def counters():
+    with _counts_lock:
+        return {
+            "pool_exhausted": dict(pool_exhausted_counts),
+            "db_unavailable": dict(db_unavailable_counts),
+            "statement_timeout": dict(statement_timeout_counts),
+        }
@@ -0,0 +1,774 @@
+"""
+SQL and JSON shaping shared by the Flask API and the async API.
+
+Both servers must return identical JSON, so the queries and the
+row -> dict conversions live here and the apps only handle
+pools, routing and serialization.
+
+Statements are fixed text and run with prepare=True, so each pool
+connection parses and plans them once
+(scripts/bench_prepared.py shows the planning cost saved).
+"""
+
+import json
+import math
+import struct
+import sys
+import time
+from array import array
+from datetime import datetime
+
+# ------------------------------------------------------------
+# SQL
+# ------------------------------------------------------------
+
+LIVE_AIRCRAFT_SQL = """
+    SELECT
+      a.hex,
+      a.flight,
+      a.category,
+      a.lat,
+      a.lon,
+      a.alt_baro,
+      a.track,
+      EXTRACT(EPOCH FROM a.last_seen) AS last_seen_epoch,
+      p.total_length_km,
+      a.gs,
+      a.baro_rate,
+      EXTRACT(EPOCH FROM a.pos_seen) AS pos_seen_epoch
+    FROM public.aircraft_live a
+    LEFT JOIN public.aircraft_paths_live p
+      ON p.hex = a.hex
+     AND p.flight = a.flight
+    WHERE a.last_seen > now() - interval '60 seconds'
+    ORDER BY a.last_seen DESC;
+"""
+
+
+LIVE_PATHS_SQL = """
+    SELECT
+      hex,
+      flight,
+      category,
+      ST_AsGeoJSON(geom) AS geom
+    FROM public.aircraft_paths_live;
+"""
+
+
+PATHS_SINCE_MIDNIGHT_SQL = """
+    WITH midnight AS (
+      SELECT date_trunc('day', now()) AS t0
+    ),
+    src AS (
+      -- archived paths that overlap today
+      SELECT
+        hex,
+        flight,
+        category,
+        start_time,
+        end_time,
+        geom
+      FROM public.aircraft_paths_history, midnight
+      WHERE end_time >= midnight.t0
+
+      UNION ALL
+
+      -- live paths that overlap today (last_seen, not now(), so the body
+      -- only changes with the data; see api_snapshots.py)
+      SELECT
+        hex,
+        flight,
+        category,
+        start_time,
+        last_seen AS end_time,
+        geom
+      FROM public.aircraft_paths_live, midnight
+      WHERE last_seen >= midnight.t0
+    )
+    SELECT
+      hex,
+      flight,
+      category,
+      MIN(start_time) AS start_time,
+      MAX(end_time)   AS end_time,
+      CASE
+        WHEN COUNT(geom) = 0 THEN NULL
+        ELSE ST_AsGeoJSON(ST_LineMerge(ST_Collect(geom)))
+      END AS geom,
+      CASE
+        WHEN COUNT(geom) = 0 THEN NULL
+        ELSE ROUND((ST_Length(ST_LineMerge(ST_Collect(geom))::geography) / 1000.0)::numeric, 1)::double precision
+      END AS total_length_km
+    FROM src
+    GROUP BY hex, flight, category
+    ORDER BY MAX(end_time) DESC;
+"""
+
+
+STATS_SQL = """
+    WITH t AS (
+      SELECT
+        date_trunc('day',  now()) AS day0,
+        date_trunc('week', now()) AS week0,
+        now() - interval '1 hour' AS hour0
+    ),
+    src AS (
+      SELECT
+        hex,
+        flight,
+        category,
+        start_time,
+        end_time
+      FROM public.aircraft_paths_history
+
+      UNION ALL
+
+      SELECT
+        p.hex,
+        p.flight,
+        p.category,
+        p.start_time,
+        p.last_seen AS end_time
+      FROM public.aircraft_paths_live p
+      WHERE p.last_seen > now() - interval '60 seconds'
+    ),
+    grouped AS (
+      SELECT
+        hex,
+        flight,
+        category,
+        MIN(start_time) AS start_time,
+        MAX(end_time)   AS end_time
+      FROM src
+      GROUP BY hex, flight, category
+    )
+    SELECT
+      (SELECT COUNT(*) FROM public.aircraft_paths_history) AS total,
+      COUNT(*) FILTER (WHERE end_time >= (SELECT week0 FROM t)) AS week,
+      COUNT(*) FILTER (WHERE end_time >= (SELECT day0  FROM t)) AS today,
+      COUNT(*) FILTER (WHERE end_time >= (SELECT hour0 FROM t)) AS hour,
+      MAX(end_time) AS last_flight_at
+    FROM grouped;
+"""
+
+
+AIRCRAFT_DETAIL_LIVE_SQL = """
+    SELECT
+        l.hex,
+        l.flight,
+        l.category,
+        l.lat,
+        l.lon,
+        l.alt_baro,
+        l.track,
+        l.last_seen,
+        l.data,
+        r.registration,
+        r.manufacturername,
+        r.model,
+        r.typecode,
+        r.operator,
+        r.operatorcallsign,
+        r.operatoricao,
+        r.owner,
+        r.country,
+        r.serialnumber,
+        r.built,
+        r.engines,
+        c.description_en,
+        c.description_is
+    FROM public.aircraft_live l
+    LEFT JOIN aircraft_registry r ON r.icao24 = l.hex
+    LEFT JOIN aircraft_categories c ON c.code = l.category
+    WHERE l.hex = %(hex)s
+"""
+
+
+AIRCRAFT_DETAIL_FALLBACK_SQL = """
+    WITH src AS (
+        SELECT hex, flight, category, end_time
+        FROM public.aircraft_paths_history
+        WHERE hex = %(hex)s
+
+        UNION ALL
+
+        SELECT hex, flight, category, last_seen AS end_time
+        FROM public.aircraft_paths_live
+        WHERE hex = %(hex)s
+    ),
+    best AS (
+        SELECT DISTINCT ON (hex) hex, flight, category
+        FROM src
+        ORDER BY hex,
+                end_time DESC NULLS LAST  -- most recent flight wins
+    )
+    SELECT
+        best.hex,
+        best.flight,
+        best.category,
+        NULL::double precision  AS lat,
+        NULL::double precision  AS lon,
+        NULL::text              AS alt_baro,
+        NULL::double precision  AS track,
+        NULL::timestamptz       AS last_seen,
+        NULL::jsonb             AS data,
+        r.registration,
+        r.manufacturername,
+        r.model,
+        r.typecode,
+        r.operator,
+        r.operatorcallsign,
+        r.operatoricao,
+        r.owner,
+        r.country,
+        r.serialnumber,
+        r.built,
+        r.engines,
+        c.description_en,
+        c.description_is
+    FROM best
+    LEFT JOIN aircraft_registry r ON r.icao24 = best.hex
+    LEFT JOIN aircraft_categories c ON c.code = best.category
+"""
+
+
+# Read in observed_at index order through a server-side cursor;
+# bucketing happens while streaming (PlaybackBuckets).
+PLAYBACK_SQL = """
+    SELECT hex, flight, source, observed_epoch, lat, lon, alt_baro, track, gs
+    FROM (
+        SELECT
+          hex,
+          flight,
+          source,
+          observed_at,
+          EXTRACT(EPOCH FROM observed_at::timestamptz) AS observed_epoch,
+          ST_Y(geom) AS lat,
+          ST_X(geom) AS lon,
+          data->>'alt_baro' AS alt_baro,
+          (data->>'track')::double precision AS track,
+          (data->>'gs')::double precision AS gs
+        FROM public.aircraft_positions_history
+        WHERE observed_at >= to_timestamp(%(t0)s)::timestamp
+          AND observed_at <  to_timestamp(%(t1)s)::timestamp
+          AND geom IS NOT NULL
+          AND (
+            NOT %(use_bbox)s
+            OR geom && ST_MakeEnvelope(%(xmin)s, %(ymin)s, %(xmax)s, %(ymax)s, 4326)
+          )
+
+        UNION ALL
+
+        -- Days already compacted by the ingest worker (no track/gs kept)
+        SELECT
+          c.hex,
+          c.flight,
+          c.source,
+          p.observed_at,
+          EXTRACT(EPOCH FROM p.observed_at::timestamptz) AS observed_epoch,
+          p.lat,
+          p.lon,
+          p.alt_baro,
+          NULL::double precision AS track,
+          NULL::double precision AS gs
+        FROM public.aircraft_tracks_compact c
+        CROSS JOIN LATERAL public.decode_compact_track(c) p
+        WHERE c.start_time <  to_timestamp(%(t1)s)::timestamp
+          AND c.end_time   >= to_timestamp(%(t0)s)::timestamp
+          AND p.observed_at >= to_timestamp(%(t0)s)::timestamp
+          AND p.observed_at <  to_timestamp(%(t1)s)::timestamp
+          AND (
+            NOT %(use_bbox)s
+            OR (p.lon BETWEEN %(xmin)s AND %(xmax)s AND p.lat BETWEEN %(ymin)s AND %(ymax)s)
+          )
+    ) pts
+    ORDER BY observed_at;
+"""
+
+
+COVERAGE_STATE_SQL = """
+    SELECT lat, lon, bearing_step_deg, range_step_km, last_position_id, updated_at
+    FROM public.coverage_state
+    WHERE id = 1;
+"""
+
+
+COVERAGE_CELLS_SQL = """
+    SELECT bearing_bin, range_bin, n, rssi_sum, rssi_n, max_range_km
+    FROM public.receiver_coverage
+    ORDER BY bearing_bin, range_bin;
+"""
+
+
+# Run and prepared by every new pool connection before a worker reports
+# ready (api_db.warm_connection). Params must have the same types as the
+# routes' so the prepared statements are reused.
+WARM_QUERIES = {
+    "live": [
+        (LIVE_AIRCRAFT_SQL, None),
+        (LIVE_PATHS_SQL, None),
+        (AIRCRAFT_DETAIL_LIVE_SQL, {"hex": ""}),
+        (AIRCRAFT_DETAIL_FALLBACK_SQL, {"hex": ""}),
+    ],
+    "history": [
+        (PATHS_SINCE_MIDNIGHT_SQL, None),
+        (STATS_SQL, None),
+        (COVERAGE_STATE_SQL, None),
+        (COVERAGE_CELLS_SQL, None),
+    ],
+    # Named server-side cursor, never prepared: nothing to warm
+    "playback": [],
+    "health": [
+        ("SELECT 1;", None),
+    ],
+}
+
+
+# ------------------------------------------------------------
+# Row shaping
+# ------------------------------------------------------------
+
+
+def live_aircraft_payload(rows):
+    aircraft = []
+    for (
+        hex_, flight, category, lat, lon, alt_baro, track, last_seen_epoch, total_length_km,
+        gs, baro_rate, pos_seen_epoch,
+    ) in rows:
+        aircraft.append(
+            {
+                "hex": hex_,
+                "flight": (flight or "").strip(),
+                "category": category,
+                "lat": lat,
+                "lon": lon,
+                "alt_baro": alt_baro,
+                "track": track,
+                "last_seen": last_seen_epoch,
+                "total_length_km": total_length_km,
+                # Dead reckoning: position at pos_seen, moving at gs (kt)
+                # along track (deg), climbing at baro_rate (ft/min)
+                "gs": gs,
+                "baro_rate": baro_rate,
+                "pos_seen": pos_seen_epoch,
+            }
+        )
+
+    return {"generated_at": time.time(), "aircraft": aircraft}
+
+
+# ------------------------------------------------------------
+# /live_aircraft compact formats (opt-in)
+#
+#   ?format=columns  or  Accept: application/vnd.adsb.columns+json
+#     Parallel column arrays; lat/lon quantized to ints (value * COORD_SCALE).
+#
+#   ?format=binary   or  Accept: application/vnd.adsb.columns+f32
+#     Little-endian, readable straight into Float32Arrays:
+#       u32 n, u32 reserved, f64 generated_at                    (16 bytes)
+#       f32[n] x 9: lat, lon, alt_baro, track, last_seen_age, total_length_km,
+#                   gs, baro_rate, pos_seen_age
+#       UTF-8 JSON tail: [[hex...], [flight...], [category...]]
+#     Missing numbers are NaN, alt_baro "ground" is -Infinity,
+#     *_age = generated_at - timestamp (seconds).
+# ------------------------------------------------------------
+
+COLUMNS_MIME = "application/vnd.adsb.columns+json"
+BINARY_MIME = "application/vnd.adsb.columns+f32"
+COORD_SCALE = 100000  # 1e-5 deg ~ 1 m
+
+BINARY_HEADER = struct.Struct("<IId")
+BINARY_COLUMNS = 9
+
+
+def live_format(format_arg, accept):
+    """Pick "json" | "columns" | "binary" from ?format= or the Accept header."""
+    if format_arg in ("columns", "binary", "json"):
+        return format_arg
+    accept = accept or ""
+    if BINARY_MIME in accept:
+        return "binary"
+    if COLUMNS_MIME in accept:
+        return "columns"
+    return "json"
+
+
+def _alt_number(alt_baro):
+    if alt_baro == "ground":
+        return -math.inf
+    try:
+        return float(alt_baro)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def live_aircraft_columns(rows):
+    generated_at = time.time()
+    cols = {
+        "hex": [], "flight": [], "category": [], "lat": [], "lon": [],
+        "alt_baro": [], "track": [], "last_seen": [], "total_length_km": [],
+        "gs": [], "baro_rate": [], "pos_seen": [],
+    }
+
+    for (
+        hex_, flight, category, lat, lon, alt_baro, track, last_seen_epoch, total_length_km,
+        gs, baro_rate, pos_seen_epoch,
+    ) in rows:
+        cols["hex"].append(hex_)
+        cols["flight"].append((flight or "").strip())
+        cols["category"].append(category)
+        cols["lat"].append(None if lat is None else round(lat * COORD_SCALE))
+        cols["lon"].append(None if lon is None else round(lon * COORD_SCALE))
+        cols["alt_baro"].append(alt_baro)
+        cols["track"].append(None if track is None else round(track, 1))
+        cols["last_seen"].append(None if last_seen_epoch is None else round(float(last_seen_epoch), 1))
+        cols["total_length_km"].append(total_length_km)
+        cols["gs"].append(None if gs is None else round(gs, 1))
+        cols["baro_rate"].append(baro_rate)
+        cols["pos_seen"].append(None if pos_seen_epoch is None else round(float(pos_seen_epoch), 1))
+
+    return {"generated_at": generated_at, "n": len(rows), "coord_scale": COORD_SCALE, **cols}
+
+
+def live_aircraft_binary(rows):
+    generated_at = time.time()
+    n = len(rows)
+    nan = math.nan
+
+    cols = [array("f") for _ in range(BINARY_COLUMNS)]
+    lat_col, lon_col, alt_col, track_col, age_col, len_col, gs_col, rate_col, pos_age_col = cols
+    hexes, flights, categories = [], [], []
+
+    for (
+        hex_, flight, category, lat, lon, alt_baro, track, last_seen_epoch, total_length_km,
+        gs, baro_rate, pos_seen_epoch,
+    ) in rows:
+        lat_col.append(nan if lat is None else lat)
+        lon_col.append(nan if lon is None else lon)
+        alt_col.append(_alt_number(alt_baro))
+        track_col.append(nan if track is None else track)
+        age_col.append(nan if last_seen_epoch is None else generated_at - float(last_seen_epoch))
+        len_col.append(nan if total_length_km is None else total_length_km)
+        gs_col.append(nan if gs is None else gs)
+        rate_col.append(nan if baro_rate is None else baro_rate)
+        pos_age_col.append(nan if pos_seen_epoch is None else generated_at - float(pos_seen_epoch))
+        hexes.append(hex_)
+        flights.append((flight or "").strip())
+        categories.append(category)
+
+    if sys.byteorder != "little":
+        for col in cols:
+            col.byteswap()
+
+    tail = json.dumps([hexes, flights, categories], separators=(",", ":")).encode("utf-8")
+    return b"".join([BINARY_HEADER.pack(n, 0, generated_at), *(c.tobytes() for c in cols), tail])
+
+
+def live_paths_payload(rows):
+    features = []
+    for hex_, flight, category, geom_json in rows:
+        if not geom_json:
+            continue
+
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {
+                    "hex": hex_,
+                    "flight": (flight or "").strip(),
+                    "category": category,
+                },
+                "geometry": json.loads(geom_json),
+            }
+        )
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+def paths_since_midnight_payload(rows):
+    features = []
+    for hex_, flight, category, start_time, end_time, geom_json, total_length_km in rows:
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {
+                    "hex": hex_,
+                    "flight": (flight or "").strip(),
+                    "category": category,
+                    "start_time": start_time.isoformat() if start_time else None,
+                    "end_time": end_time.isoformat() if end_time else None,
+                    "total_length_km": total_length_km,
+                },
+                "geometry": json.loads(geom_json) if geom_json else None,
+            }
+        )
+
+    return {"type": "FeatureCollection", "features": features}
+
+
+def stats_payload(row):
+    total, week, today, hour, last_flight_at = row
+
+    return {
+        "total": int(total or 0),
+        "week": int(week or 0),
+        "today": int(today or 0),
+        "hour": int(hour or 0),
+        "last_flight_at": last_flight_at.isoformat() if last_flight_at else None,
+    }
+
+
+def aircraft_detail_payload(row):
+    (
+        hex_, flight, category, lat, lon, alt_baro, track, last_seen, data,
+        registration, manufacturername, model, typecode, operator,
+        operatorcallsign, operatoricao, owner, country, serialnumber,
+        built, engines, description_en, description_is,
+    ) = row
+
+    return {
+        "hex": hex_,
+        "flight": (flight or "").strip(),
+        "category": category,
+        "category_en": description_en,
+        "category_is": description_is,
+        "lat": lat,
+        "lon": lon,
+        "alt_baro": alt_baro,
+        "track": track,
+        "last_seen": last_seen.isoformat() if last_seen else None,
+        "registration": registration,
+        "manufacturername": manufacturername,
+        "model": model,
+        "typecode": typecode,
+        "operator": operator,
+        "operatorcallsign": operatorcallsign,
+        "operatoricao": operatoricao,
+        "owner": owner,
+        "country": country,
+        "serialnumber": serialnumber,
+        "built": str(built) if built else None,
+        "engines": engines,
+        "gs": data.get("gs") if data else None,
+        "rssi": data.get("rssi") if data else None,
+        "squawk": data.get("squawk") if data else None,
+    }
+
+
+# ------------------------------------------------------------
+# /playback (NDJSON stream)
+# ------------------------------------------------------------
+
+PLAYBACK_MIME = "application/x-ndjson"
+PLAYBACK_DEFAULT_WINDOW_S = 3600
+PLAYBACK_MAX_WINDOW_S = 24 * 3600
+PLAYBACK_MIN_STEP_S = 1
+PLAYBACK_MAX_STEP_S = 3600
+
+
+def _parse_time(value):
+    """Epoch seconds or ISO 8601 (naive = local time)."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def playback_params(args):
+    """
+    Validate ?from=&to=&step=&bbox= (bbox = minLon,minLat,maxLon,maxLat).
+    Raises ValueError with a client-facing message.
+    """
+    try:
+        t1 = _parse_time(args["to"]) if args.get("to") else time.time()
+        t0 = _parse_time(args["from"]) if args.get("from") else t1 - PLAYBACK_DEFAULT_WINDOW_S
+        step = float(args.get("step") or 5)
+    except ValueError:
+        raise ValueError("from/to must be epoch seconds or ISO 8601, step a number") from None
+
+    # float() accepts "nan" and "inf", which slip through the range checks below
+    if not all(math.isfinite(v) for v in (t0, t1, step)):
+        raise ValueError("from/to/step must be finite")
+    if t1 <= t0:
+        raise ValueError("'to' must be after 'from'")
+    if t1 - t0 > PLAYBACK_MAX_WINDOW_S:
+        raise ValueError(f"window larger than {PLAYBACK_MAX_WINDOW_S} s")
+    if not PLAYBACK_MIN_STEP_S <= step <= PLAYBACK_MAX_STEP_S:
+        raise ValueError(f"step must be between {PLAYBACK_MIN_STEP_S} and {PLAYBACK_MAX_STEP_S} s")
+
+    params = {
+        "t0": t0, "t1": t1, "step": step, "use_bbox": False,
+        "xmin": None, "ymin": None, "xmax": None, "ymax": None,
+    }
+
+    if args.get("bbox"):
+        try:
+            xmin, ymin, xmax, ymax = (float(v) for v in args["bbox"].split(","))
+        except ValueError:
+            raise ValueError("bbox must be minLon,minLat,maxLon,maxLat") from None
+        if not all(math.isfinite(v) for v in (xmin, ymin, xmax, ymax)):
+            raise ValueError("bbox values must be finite")
+        params.update(use_bbox=True, xmin=xmin, ymin=ymin, xmax=xmax, ymax=ymax)
+
+    return params
+
+
+def _ndjson(obj):
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def playback_meta(params):
+    bbox = [params["xmin"], params["ymin"], params["xmax"], params["ymax"]]
+    return _ndjson({
+        "type": "meta",
+        "from": params["t0"],
+        "to": params["t1"],
+        "step": params["step"],
+        "bbox": bbox if params["use_bbox"] else None,
+    })
+
+
+class PlaybackBuckets:
+    """
+    Fold rows (in observed_at order) into one state per hex per time bucket.
+    Only the current bucket is held in memory; feed() returns the finished
+    bucket's NDJSON line when a row crosses into the next bucket.
+    Empty buckets are not emitted.
+    """
+
+    def __init__(self, params):
+        self.t0 = params["t0"]
+        self.step = params["step"]
+        self.bucket = None
+        self.states = {}
+
+    def feed(self, row):
+        hex_, flight, source, observed_epoch, lat, lon, alt_baro, track, gs = row
+        observed_epoch = float(observed_epoch)
+        bucket = self.t0 + math.floor((observed_epoch - self.t0) / self.step) * self.step
+
+        out = None
+        if bucket != self.bucket:
+            out = self.flush()
+            self.bucket = bucket
+
+        # Rows arrive oldest first, so the last one per hex wins
+        self.states[hex_] = {
+            "hex": hex_,
+            "flight": (flight or "").strip(),
+            "source": source,
+            "lat": lat,
+            "lon": lon,
+            "alt_baro": alt_baro,
+            "track": track,
+            "gs": gs,
+            "observed_at": observed_epoch,
+        }
+        return out
+
+    def flush(self):
+        if not self.states:
+            return None
+        line = _ndjson({"type": "frame", "t": self.bucket, "aircraft": list(self.states.values())})
+        self.states = {}
+        return line
+
+
+# ------------------------------------------------------------
+# /coverage (GeoJSON)
+# ------------------------------------------------------------
+
+EARTH_RADIUS_KM = 6371.0088
+ARC_POINTS_PER_BIN = 3
+
+
+def _destination(lat, lon, bearing_deg, km):
+    """Point at `km` along `bearing_deg` from lat/lon (spherical earth) -> [lon, lat]."""
+    phi1 = math.radians(lat)
+    lam1 = math.radians(lon)
+    theta = math.radians(bearing_deg)
+    delta = km / EARTH_RADIUS_KM
+
+    phi2 = math.asin(
+        math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta)
+    )
+    lam2 = lam1 + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi1),
+        math.cos(delta) - math.sin(phi1) * math.sin(phi2),
+    )
+    return [round(math.degrees(lam2), 5), round(math.degrees(phi2), 5)]
+
+
+def _arc(lat, lon, b0, b1, km):
+    step = (b1 - b0) / ARC_POINTS_PER_BIN
+    return [_destination(lat, lon, b0 + i * step, km) for i in range(ARC_POINTS_PER_BIN + 1)]
+
+
+def coverage_payload(state, rows):
+    """
+    GeoJSON FeatureCollection:
+    - one "range" Polygon: max observed range per bearing bin
+    - one "cell" Polygon per (bearing, range) bin with n and mean_rssi
+    """
+    if state is None:
+        return {"type": "FeatureCollection", "features": [], "receiver": None}
+
+    lat, lon, bearing_step, range_step, last_position_id, updated_at = state
+    features = []
+    max_range = {}
+
+    for bearing_bin, range_bin, n, rssi_sum, rssi_n, max_range_km in rows:
+        b0 = bearing_bin * bearing_step
+        b1 = b0 + bearing_step
+        r0 = range_bin * range_step
+        r1 = r0 + range_step
+        max_range[bearing_bin] = max(max_range.get(bearing_bin, 0.0), max_range_km)
+
+        ring = _arc(lat, lon, b0, b1, r1) + _arc(lat, lon, b0, b1, r0)[::-1]
+        ring.append(ring[0])
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {
+                    "kind": "cell",
+                    "bearing": b0,
+                    "range_km": r0,
+                    "n": int(n),
+                    "mean_rssi": round(rssi_sum / rssi_n, 1) if rssi_n else None,
+                },
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+            }
+        )
+
+    if max_range:
+        ring = []
+        n_bins = int(round(360 / bearing_step))
+        for b in range(n_bins):
+            ring += _arc(lat, lon, b * bearing_step, (b + 1) * bearing_step, max_range.get(b, 0.0))
+        ring.append(ring[0])
+        features.insert(
+            0,
+            {
+                "type": "Feature",
+                "properties": {
+                    "kind": "range",
+                    "max_range_km": {
+                        str(b * bearing_step): round(km, 1) for b, km in sorted(max_range.items())
+                    },
+                },
+                "geometry": {"type": "Polygon", "coordinates": [ring]},
+            },
+        )
+
+    return {
+        "type": "FeatureCollection",
+        "receiver": {
+            "lat": lat,
+            "lon": lon,
+            "bearing_step_deg": bearing_step,
+            "range_step_km": range_step,
+            "last_position_id": last_position_id,
+            "updated_at": updated_at.isoformat() if updated_at else None,
+        },
+        "features": features,
+    }
@@ -0,0 +1,168 @@
+"""
+Precompressed response bodies shared by the Flask API and the async API.
+
+A route body is identified by a hash of its bytes (its data version). The
+gzip and brotli forms of each version are produced once and then reused:
+- inside a worker, the latest snapshot per route is kept in memory
+- across gunicorn workers, compressed bodies are shared through
+  SNAPSHOT_DIR (tmpfs by default), so N workers compress a version once
+
+The client's Accept-Encoding picks the variant; responses carry
+Vary: Accept-Encoding and a weak ETag (same data, any encoding), and
+If-None-Match on the current version answers 304.
+
+brotli is optional; without it only gzip is offered.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+_DEFAULT_DIR = Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+SNAPSHOT_DIR = Path(os.environ.get("SNAPSHOT_DIR", str(_DEFAULT_DIR / "adsb-snapshots")))
+
+# Below this, compression is not worth it (same as nginx gzip_min_length)
+SNAPSHOT_MIN_BYTES = int(os.environ.get("SNAPSHOT_MIN_BYTES", "1000"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _gzip(body):
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _brotli(body):
+    return brotli.compress(body, quality=BROTLI_QUALITY)
+
+
+# Preference order when the client accepts several with the same q
+COMPRESSORS = {"br": _brotli, "gzip": _gzip} if brotli else {"gzip": _gzip}
+
+
+def dumps(payload):
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def accepted_encoding(header):
+    """Best supported content-coding in an Accept-Encoding header, or None."""
+    explicit, wildcard = {}, 0.0
+    for part in (header or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+
+        if name == "*":
+            wildcard = q
+        elif name in COMPRESSORS:
+            explicit[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in COMPRESSORS:  # preference order breaks ties
+        q = explicit.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class Snapshot:
+    """One data version of one route: raw body + lazily built variants."""
+
+    def __init__(self, key, body):
+        self.key = key
+        self.body = body
+        self.version = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self.etag = f'W/"{self.version}"'
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding):
+        with self._lock:
+            data = self._variants.get(encoding)
+            if data is None:
+                data = self._load(encoding)
+                if data is None:
+                    data = COMPRESSORS[encoding](self.body)
+                    self._store(encoding, data)
+                self._variants[encoding] = data
+            return data
+
+    # ---------- shared between workers ----------
+
+    def _path(self, encoding):
+        return SNAPSHOT_DIR / f"{self.key}.{self.version}.{encoding}"
+
+    def _load(self, encoding):
+        try:
+            return self._path(encoding).read_bytes()
+        except OSError:
+            return None
+
+    def _store(self, encoding, data):
+        # Best effort: a read-only or missing dir only costs recompression
+        try:
+            SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=SNAPSHOT_DIR, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, self._path(encoding))
+
+            # Keep only the current version of this route
+            for old in SNAPSHOT_DIR.glob(f"{self.key}.*"):
+                if old.name.split(".")[1] != self.version:
+                    old.unlink(missing_ok=True)
+        except OSError as e:
+            log.warning("cannot share snapshot %s: %r", self.key, e)
+
+
+_latest = {}
+
+
+def snapshot(key, body):
+    """Latest snapshot for `key`, replaced when the body (data) changes."""
+    snap = _latest.get(key)
+    if snap is None or snap.body != body:
+        snap = Snapshot(key, body)
+        _latest[key] = snap
+    return snap
+
+
+def respond(key, body, accept_encoding=None, if_none_match=None, vary=()):
+    """
+    -> (body, status, headers) for `body` under route `key`.
+    `vary` lists request headers (besides Accept-Encoding) the body depends on.
+    """
+    snap = snapshot(key, body)
+    headers = {
+        "ETag": snap.etag,
+        "Vary": ", ".join(("Accept-Encoding", *vary)),
+    }
+
+    if if_none_match and (
+        if_none_match.strip() == "*" or f'"{snap.version}"' in if_none_match
+    ):
+        return b"", 304, headers
+
+    encoding = accepted_encoding(accept_encoding)
+    if encoding is None or len(body) < SNAPSHOT_MIN_BYTES:
+        return body, 200, headers
+
+    headers["Content-Encoding"] = encoding
+    return snap.variant(encoding), 200, headers
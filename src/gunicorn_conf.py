@@ -0,0 +1,16 @@
+"""
+gunicorn hooks for the Flask API:
+
+  gunicorn -c src/gunicorn_conf.py --workers 2 --threads 4 src.aircraft_digest_flask:app
+
+Each worker opens and warms its pools after fork, before it accepts its
+first request (see api_db.py). The async API does the same in Quart's
+before_serving and does not need this file.
+"""
+
+
+def post_worker_init(worker):
+    # The app module is already imported in this worker at this point
+    from src.aircraft_digest_flask import open_pools
+
+    open_pools(wait=True)
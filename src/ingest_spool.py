@@ -0,0 +1,145 @@
+"""
+Local write-ahead spool for the ingest worker (SQLite, stdlib only).
+
+The reader appends every merged tick here first; a separate flusher drains
+the oldest ticks into Postgres and acks them after commit. A Postgres outage
+therefore only delays writes instead of losing snapshots.
+
+Guarantees:
+- Replay order = append order (AUTOINCREMENT id, never reused)
+- A tick is removed only after ack() (i.e. after the Postgres commit)
+- Disk usage (database + WAL file) is bounded by max_bytes: when full, the
+  OLDEST ticks are dropped
+- A tick that cannot be decoded is moved to the quarantine table (last
+  QUARANTINE_KEEP kept, for inspection) instead of blocking the flusher
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+
+QUARANTINE_KEEP = 100
+
+
+class Spool:
+    def __init__(self, path, max_bytes):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+
+        # One connection shared by the reader and flusher threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ticks (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                captured_at REAL NOT NULL,
+                payload     TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quarantine (
+                id          INTEGER PRIMARY KEY,
+                captured_at REAL NOT NULL,
+                payload     TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def append(self, captured_at, payload):
+        """Append one tick; payload is opaque text (see encode_tick())."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO ticks (captured_at, payload) VALUES (?, ?)",
+                (captured_at, payload),
+            )
+            self._conn.commit()
+            self._enforce_limit()
+
+    def read_batch(self, limit):
+        """Oldest ticks first: [(id, captured_at, payload), ...]"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, captured_at, payload FROM ticks ORDER BY id LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return rows
+
+    def ack(self, last_id):
+        """Remove every tick up to and including last_id."""
+        with self._lock:
+            self._conn.execute("DELETE FROM ticks WHERE id <= ?", (last_id,))
+            self._conn.commit()
+
+    def quarantine(self, tick_id):
+        """Move one tick out of the replay queue into the quarantine table."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO quarantine
+                SELECT id, captured_at, payload FROM ticks WHERE id = ?
+                """,
+                (tick_id,),
+            )
+            self._conn.execute("DELETE FROM ticks WHERE id = ?", (tick_id,))
+            self._conn.execute(
+                "DELETE FROM quarantine WHERE id NOT IN "
+                "(SELECT id FROM quarantine ORDER BY id DESC LIMIT ?)",
+                (QUARANTINE_KEEP,),
+            )
+            self._conn.commit()
+
+    def pending(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM ticks").fetchone()[0]
+
+    def _used_bytes(self):
+        # Live pages of the main file plus the WAL, which is not included in
+        # page_count and grows up to wal_autocheckpoint pages between checkpoints
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size + self._wal_bytes()
+
+    def _wal_bytes(self):
+        try:
+            return Path(f"{self.path}-wal").stat().st_size
+        except OSError:
+            return 0
+
+    def _checkpoint(self):
+        # Copy the WAL into the main file and truncate it to zero bytes
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _enforce_limit(self):
+        if self._used_bytes() <= self.max_bytes:
+            return
+
+        # Often only the WAL is over the cap; fold it back before dropping data
+        self._checkpoint()
+
+        # Freed pages are reused by SQLite, so the file stays around max_bytes
+        dropped = 0
+        while self._used_bytes() > self.max_bytes:
+            n = self._conn.execute("SELECT COUNT(*) FROM ticks").fetchone()[0]
+            if n <= 1:
+                break
+            cur = self._conn.execute(
+                """
+                DELETE FROM ticks
+                WHERE id IN (SELECT id FROM ticks ORDER BY id LIMIT ?)
+                """,
+                (max(1, n // 10),),
+            )
+            dropped += cur.rowcount
+            self._conn.commit()
+            self._checkpoint()
+
+        if dropped:
+            print(f"[SPOOL] full ({self.max_bytes} bytes) -> dropped {dropped} oldest ticks")
@@ -267,48 +267,31 @@ const colorRamp = [
   [0, 80, 180], // deep blue
 ];
 
-function getRampColor(t) {
-  t = Math.max(0, Math.min(1, t));
-
-  const idx = Math.min(colorRamp.length - 1, Math.floor(t * colorRamp.length));
-  const [r, g, b] = colorRamp[idx];
-
-  return `rgb(${r},${g},${b})`;
-}
-
-function addGradientLine(feature) {
-  if (!feature.geometry || feature.geometry.type !== "LineString") return [];
-
-  const coords = feature.geometry.coordinates;
-  if (!coords || coords.length < 2) return [];
-
-  const pts = coords.map(([lon, lat]) => L.latLng(lat, lon));
-
-  // Cumulative distance (meters)
-  const cumulative = [0];
-  for (let i = 1; i < pts.length; i++) {
-    cumulative[i] = cumulative[i - 1] + pts[i - 1].distanceTo(pts[i]);
-  }
+// All paths are drawn by one canvas layer (path_canvas.js)
+const pathsLayer = L.pathCanvasLayer({
+  colors: colorRamp.map(([r, g, b]) => `rgb(${r},${g},${b})`),
+  weight: 2,
+}).addTo(map);
 
-  const totalDistance = cumulative[cumulative.length - 1];
-  if (totalDistance <= 0) return [];
+// Index paths by hex so sidebar/path clicks can zoom to them
+window.pathsByHex = {};
 
-  const segments = [];
+function zoomToPath(hex) {
+  const paths = window.pathsByHex[hex];
+  if (!paths || paths.length === 0) return false;
 
-  for (let i = 0; i < pts.length - 1; i++) {
-    // Start yellow → end blue:
-    const t = cumulative[i] / totalDistance;
-    const color = getRampColor(t);
+  const bounds = L.latLngBounds([]);
+  paths.forEach((p) => bounds.extend(p.bounds));
+  map.fitBounds(bounds, { padding: [40, 40], maxZoom: 13 });
+  return true;
+}
 
-    segments.push(
-      L.polyline([pts[i], pts[i + 1]], { color, weight: 2 }).bindTooltip(
-        feature.properties?.flight || ""
-      )
-    );
-  }
+window.zoomToPath = zoomToPath;
 
-  return segments;
-}
+pathsLayer.on("pathclick", (e) => {
+  if (measureActive) return;
+  zoomToPath(e.path.properties.hex);
+});
 
 function escapeHtml(str) {
   const d = document.createElement("div");
@@ -386,6 +369,50 @@ li.onclick = () => openAircraftDetail(hex);
   }
 }
 
+// -----------------------------
+// Adaptive polling
+// -----------------------------
+// Markers are dead-reckoned between polls (see animateAircraft), so the map
+// stays smooth with fewer requests; idle and background tabs poll slower.
+const POLL_ACTIVE_MS = 4000;
+const POLL_IDLE_MS = 8000; // no input for IDLE_AFTER_MS
+const POLL_HIDDEN_MS = 10000; // tab in background
+const IDLE_AFTER_MS = 60000;
+
+let lastInteraction = Date.now();
+["pointerdown", "pointermove", "keydown", "wheel", "touchstart"].forEach((ev) =>
+  window.addEventListener(ev, () => { lastInteraction = Date.now(); }, { passive: true })
+);
+
+function pollInterval() {
+  if (document.hidden) return POLL_HIDDEN_MS;
+  return Date.now() - lastInteraction > IDLE_AFTER_MS ? POLL_IDLE_MS : POLL_ACTIVE_MS;
+}
+
+// Run fn now and then again pollInterval() after each run finishes;
+// refresh immediately when the tab becomes visible again.
+function pollAdaptive(fn) {
+  let timer = null;
+  let running = false;
+
+  async function tick() {
+    if (running) return;
+    running = true;
+    clearTimeout(timer);
+    try {
+      await fn();
+    } finally {
+      running = false;
+      timer = setTimeout(tick, pollInterval());
+    }
+  }
+
+  document.addEventListener("visibilitychange", () => {
+    if (!document.hidden) tick();
+  });
+  tick();
+}
+
 async function updateLivePaths() {
   try {
     const mode = window.PATHS_MODE || "live";
@@ -394,27 +421,22 @@ async function updateLivePaths() {
     const response = await fetch(url, { cache: "no-store" });
     const geojson = await response.json();
 
-    // Remove previous layer(s)
-    if (Array.isArray(window.livePathsLayer)) {
-      window.livePathsLayer.forEach((layer) => map.removeLayer(layer));
-    }
-    window.livePathsLayer = [];
-
-    // Index segments by hex so sidebar clicks can zoom to paths
+    // Update paths in place: unchanged paths are skipped, vanished ones removed
+    const seen = new Set();
     window.pathsByHex = {};
 
-    // Create new segments
     (geojson.features || []).forEach((feature) => {
       const hex = feature?.properties?.hex;
-      const segs = addGradientLine(feature);
+      const id = `${hex}|${feature?.properties?.flight || ""}`;
+      const path = pathsLayer.setPath(id, feature);
+      if (!path) return;
 
-      if (hex && !window.pathsByHex[hex]) window.pathsByHex[hex] = [];
+      seen.add(id);
+      if (hex) (window.pathsByHex[hex] ||= []).push(path);
+    });
 
-      segs.forEach((s) => {
-        s.addTo(map);
-        window.livePathsLayer.push(s);
-        if (hex) window.pathsByHex[hex].push(s);
-      });
+    pathsLayer.ids().forEach((id) => {
+      if (!seen.has(id)) pathsLayer.removePath(id);
     });
 
     // ✅ Update sidebar in midnight mode
@@ -432,8 +454,114 @@ async function updateLivePaths() {
 window.updateLivePaths = updateLivePaths;
 
 // Initial load + refresh
-updateLivePaths();
-setInterval(updateLivePaths, 2000);
+pollAdaptive(updateLivePaths);
+
+// -----------------------------
+// /live_aircraft wire formats
+// "json" = array of objects, "columns" = parallel arrays,
+// "binary" = Float32 columns (layout in src/api_queries.py)
+// -----------------------------
+const LIVE_FORMAT = "binary";
+
+function decodeLiveColumns(data) {
+  const scale = data.coord_scale || 1;
+  const aircraft = [];
+  for (let i = 0; i < data.n; i++) {
+    aircraft.push({
+      hex: data.hex[i],
+      flight: data.flight[i],
+      category: data.category[i],
+      lat: data.lat[i] == null ? null : data.lat[i] / scale,
+      lon: data.lon[i] == null ? null : data.lon[i] / scale,
+      alt_baro: data.alt_baro[i],
+      track: data.track[i],
+      last_seen: data.last_seen[i],
+      total_length_km: data.total_length_km[i],
+      gs: data.gs[i],
+      baro_rate: data.baro_rate[i],
+      pos_seen: data.pos_seen[i],
+    });
+  }
+  return { generated_at: data.generated_at, aircraft };
+}
+
+function decodeLiveBinary(buf) {
+  const view = new DataView(buf);
+  const n = view.getUint32(0, true);
+  const generatedAt = view.getFloat64(8, true);
+
+  const col = (k) => new Float32Array(buf, 16 + k * 4 * n, n);
+  const [lat, lon, alt, track, age, len, gs, rate, posAge] = [0, 1, 2, 3, 4, 5, 6, 7, 8].map(col);
+  const [hexes, flights, categories] = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buf, 16 + 9 * 4 * n))
+  );
+
+  const num = (v) => (Number.isNaN(v) ? null : v);
+  const aircraft = [];
+  for (let i = 0; i < n; i++) {
+    aircraft.push({
+      hex: hexes[i],
+      flight: flights[i],
+      category: categories[i],
+      lat: num(lat[i]),
+      lon: num(lon[i]),
+      alt_baro: alt[i] === -Infinity ? "ground" : num(alt[i]),
+      track: num(track[i]),
+      last_seen: Number.isNaN(age[i]) ? null : generatedAt - age[i],
+      total_length_km: num(len[i]),
+      gs: num(gs[i]),
+      baro_rate: num(rate[i]),
+      pos_seen: Number.isNaN(posAge[i]) ? null : generatedAt - posAge[i],
+    });
+  }
+  return { generated_at: generatedAt, aircraft };
+}
+
+async function fetchLiveAircraft() {
+  const resp = await fetch(`/live_aircraft?format=${LIVE_FORMAT}`, { cache: "no-store" });
+  if (LIVE_FORMAT === "binary") return decodeLiveBinary(await resp.arrayBuffer());
+  if (LIVE_FORMAT === "columns") return decodeLiveColumns(await resp.json());
+  return resp.json();
+}
+
+// -----------------------------
+// Dead reckoning
+// -----------------------------
+// Between polls each marker is moved from its last fix (lat/lon at
+// pos_seen) along track at gs. Times are on the server clock:
+// serverClockOffset = server time - Date.now() at the last response.
+const DR_MAX_SECONDS = 20; // never extrapolate further than this past a fix
+const DR_FRAME_MS = 250;
+const KT_TO_MPS = 0.514444;
+const METERS_PER_DEG_LAT = 111320;
+
+let serverClockOffset = 0;
+let lastFrame = 0;
+
+function deadReckon(ac, nowServer) {
+  if (ac.gs == null || ac.track == null || ac.posSeen == null) return [ac.lat, ac.lon];
+
+  const dt = Math.min(Math.max(nowServer - ac.posSeen, 0), DR_MAX_SECONDS);
+  const meters = ac.gs * KT_TO_MPS * dt;
+  const rad = (ac.track * Math.PI) / 180;
+  const dLat = (meters * Math.cos(rad)) / METERS_PER_DEG_LAT;
+  const dLon = (meters * Math.sin(rad)) / (METERS_PER_DEG_LAT * Math.cos((ac.lat * Math.PI) / 180));
+  return [ac.lat + dLat, ac.lon + dLon];
+}
+
+function animateAircraft(ts) {
+  requestAnimationFrame(animateAircraft);
+  if (ts - lastFrame < DR_FRAME_MS) return;
+  lastFrame = ts;
+
+  const nowServer = Date.now() / 1000 + serverClockOffset;
+  for (const [hex, marker] of Object.entries(aircraftMarkers)) {
+    const ac = aircraftState[hex];
+    if (ac && ac.hasPosition) marker.setLatLng(deadReckon(ac, nowServer));
+  }
+}
+
+requestAnimationFrame(animateAircraft);
 
 // -----------------------------
 // Update aircraft
@@ -448,10 +576,11 @@ async function updateLocalAircraft() {
   const now = Date.now() / 1000;
 
   try {
-    const resp = await fetch("/live_aircraft", {
-      cache: "no-store",
-    });
-    const data = await resp.json();
+    const data = await fetchLiveAircraft();
+    if (typeof data.generated_at === "number") {
+      serverClockOffset = data.generated_at - Date.now() / 1000;
+    }
+    const nowServer = Date.now() / 1000 + serverClockOffset;
 
     const aircraftArr = Array.isArray(data.aircraft) ? data.aircraft : [];
     const seenHexes = new Set();
@@ -468,6 +597,8 @@ async function updateLocalAircraft() {
         last_seen,
         last_seen_epoch,
         total_length_km,
+        gs,
+        pos_seen,
       } = ac;
 
       if (!hex) continue;
@@ -493,15 +624,18 @@ async function updateLocalAircraft() {
         hasPosition: lat != null && lon != null,
         lastSeen: lastSeenEpoch,
         totalLengthKm: (typeof total_length_km === "number") ? total_length_km : null,
+        gs: typeof gs === "number" ? gs : null,
+        posSeen: typeof pos_seen === "number" ? pos_seen : null,
       });
 
       // Marker handling
       if (lat != null && lon != null) {
+        const position = deadReckon(aircraftState[hex], nowServer);
         const altNum = typeof alt_baro === "number" ? alt_baro : parseFloat(alt_baro);
         const color = altNum > 30000 ? "#ff0000" : altNum > 10000 ? "#ffa500" : "#00ff00";
 
         if (!aircraftMarkers[hex]) {
-          aircraftMarkers[hex] = L.marker([lat, lon], {
+          aircraftMarkers[hex] = L.marker(position, {
             icon: getAircraftIcon(color),
             rotationAngle: track ?? 0,
             rotationOrigin: "center center",
@@ -509,7 +643,7 @@ async function updateLocalAircraft() {
             .bindTooltip(aircraftState[hex].flight)
             .addTo(aircraftLayer);
         } else {
-          aircraftMarkers[hex].setLatLng([lat, lon]);
+          aircraftMarkers[hex].setLatLng(position);
           aircraftMarkers[hex].setRotationAngle(track ?? 0);
         }
 
@@ -684,5 +818,4 @@ window.openAircraftDetail = openAircraftDetail;
 // -----------------------------
 // Start
 // -----------------------------
-updateLocalAircraft();
-setInterval(updateLocalAircraft, 2000);
\ No newline at end of file
+pollAdaptive(updateLocalAircraft);
\ No newline at end of file
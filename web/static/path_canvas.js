@@ -0,0 +1,278 @@
+// -----------------------------
+// Canvas path renderer
+// -----------------------------
+// One <canvas> overlay draws every gradient flight path, instead of one
+// Leaflet polyline per vertex pair. Paths are kept in typed vertex buffers
+// keyed by id, so each poll only touches the paths that changed.
+//
+//   const layer = L.pathCanvasLayer({ colors: [...] }).addTo(map);
+//   layer.setPath(id, feature)   // add/update (no-op if unchanged)
+//   layer.removePath(id)
+//   layer.on("pathclick", (e) => e.path.bounds ...)
+//
+// Hover/click hit testing is done on the projected vertices, so the canvas
+// itself never captures mouse events (map drag/measure keep working).
+
+L.PathCanvasLayer = L.Layer.extend({
+  options: {
+    colors: ["#ff0"], // ramp, start → end of path
+    weight: 2,
+    hitTolerance: 6, // px
+    pane: "overlayPane",
+  },
+
+  initialize(options) {
+    L.setOptions(this, options);
+    this._paths = new Map();
+    this._frame = null;
+  },
+
+  onAdd(map) {
+    this._canvas = L.DomUtil.create("canvas", "leaflet-path-canvas");
+    Object.assign(this._canvas.style, { position: "absolute", pointerEvents: "none" });
+    this.getPane().appendChild(this._canvas);
+
+    this._tooltip = L.tooltip({ sticky: true, direction: "top" });
+
+    map.on("moveend resize", this._reset, this);
+    map.on("zoomstart", this._hide, this);
+    map.on("mousemove", this._onMouseMove, this);
+    map.on("click", this._onClick, this);
+    this._reset();
+  },
+
+  onRemove(map) {
+    map.off("moveend resize", this._reset, this);
+    map.off("zoomstart", this._hide, this);
+    map.off("mousemove", this._onMouseMove, this);
+    map.off("click", this._onClick, this);
+    map.closeTooltip(this._tooltip);
+    L.DomUtil.remove(this._canvas);
+    if (this._frame) L.Util.cancelAnimFrame(this._frame);
+  },
+
+  // ---------- data ----------
+
+  setPath(id, feature) {
+    const coords = feature?.geometry?.type === "LineString" ? feature.geometry.coordinates : null;
+    if (!coords || coords.length < 2) {
+      this.removePath(id);
+      return null;
+    }
+
+    const n = coords.length;
+    const [lastLon, lastLat] = coords[n - 1];
+    const key = `${n}:${lastLon}:${lastLat}`;
+    const old = this._paths.get(id);
+    if (old && old.key === key) {
+      old.properties = feature.properties || {};
+      return old;
+    }
+
+    const lonlat = new Float64Array(n * 2);
+    for (let i = 0; i < n; i++) {
+      lonlat[2 * i] = coords[i][0];
+      lonlat[2 * i + 1] = coords[i][1];
+    }
+
+    const path = {
+      id,
+      key,
+      properties: feature.properties || {},
+      lonlat,
+      colorIdx: this._segmentColors(lonlat),
+      bounds: L.latLngBounds(coords.map(([lon, lat]) => [lat, lon])),
+      screen: null, // Float32Array of projected x,y (filled on redraw)
+      box: null, // [minX, minY, maxX, maxY] in container px
+    };
+
+    // Zero-length paths are not drawn (same as the old polyline renderer)
+    if (!path.colorIdx) {
+      this.removePath(id);
+      return null;
+    }
+
+    this._paths.set(id, path);
+    this._project(path);
+    this._scheduleRedraw();
+    return path;
+  },
+
+  removePath(id) {
+    if (this._paths.delete(id)) this._scheduleRedraw();
+  },
+
+  ids() {
+    return Array.from(this._paths.keys());
+  },
+
+  getPath(id) {
+    return this._paths.get(id);
+  },
+
+  // Cumulative distance along the path → ramp color index per segment
+  _segmentColors(lonlat) {
+    const n = lonlat.length / 2;
+    const cumulative = new Float64Array(n);
+    for (let i = 1; i < n; i++) {
+      const a = L.latLng(lonlat[2 * i - 1], lonlat[2 * i - 2]);
+      const b = L.latLng(lonlat[2 * i + 1], lonlat[2 * i]);
+      cumulative[i] = cumulative[i - 1] + a.distanceTo(b);
+    }
+
+    const total = cumulative[n - 1];
+    if (total <= 0) return null;
+
+    const k = this.options.colors.length;
+    const idx = new Uint8Array(n - 1);
+    for (let i = 0; i < n - 1; i++) {
+      idx[i] = Math.min(k - 1, Math.floor((cumulative[i] / total) * k));
+    }
+    return idx;
+  },
+
+  // ---------- drawing ----------
+
+  _hide() {
+    this._canvas.style.visibility = "hidden";
+  },
+
+  _reset() {
+    const map = this._map;
+    const size = map.getSize();
+    const dpr = window.devicePixelRatio || 1;
+
+    L.DomUtil.setPosition(this._canvas, map.containerPointToLayerPoint([0, 0]));
+    this._canvas.width = size.x * dpr;
+    this._canvas.height = size.y * dpr;
+    this._canvas.style.width = `${size.x}px`;
+    this._canvas.style.height = `${size.y}px`;
+    this._canvas.style.visibility = "visible";
+
+    for (const path of this._paths.values()) this._project(path);
+    this._redraw();
+  },
+
+  _project(path) {
+    if (!this._map) return;
+
+    const map = this._map;
+    const zoom = map.getZoom();
+    const origin = map.getPixelBounds().min;
+    const n = path.lonlat.length / 2;
+    const screen = new Float32Array(n * 2);
+    let minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+
+    for (let i = 0; i < n; i++) {
+      const p = map.project([path.lonlat[2 * i + 1], path.lonlat[2 * i]], zoom);
+      const x = p.x - origin.x;
+      const y = p.y - origin.y;
+      screen[2 * i] = x;
+      screen[2 * i + 1] = y;
+      if (x < minX) minX = x;
+      if (x > maxX) maxX = x;
+      if (y < minY) minY = y;
+      if (y > maxY) maxY = y;
+    }
+
+    path.screen = screen;
+    path.box = [minX, minY, maxX, maxY];
+  },
+
+  _scheduleRedraw() {
+    if (this._map && !this._frame) {
+      this._frame = L.Util.requestAnimFrame(this._redraw, this);
+    }
+  },
+
+  _redraw() {
+    this._frame = null;
+    if (!this._map) return;
+
+    const ctx = this._canvas.getContext("2d");
+    const dpr = window.devicePixelRatio || 1;
+    const size = this._map.getSize();
+
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+    ctx.clearRect(0, 0, size.x, size.y);
+    ctx.lineWidth = this.options.weight;
+    ctx.lineCap = "round";
+
+    // One stroke per ramp color across ALL paths
+    const visible = [];
+    for (const path of this._paths.values()) {
+      const [minX, minY, maxX, maxY] = path.box;
+      if (maxX >= 0 && maxY >= 0 && minX <= size.x && minY <= size.y) visible.push(path);
+    }
+
+    this.options.colors.forEach((color, c) => {
+      ctx.beginPath();
+      for (const path of visible) {
+        const s = path.screen;
+        const idx = path.colorIdx;
+        for (let i = 0; i < idx.length; i++) {
+          if (idx[i] !== c) continue;
+          ctx.moveTo(s[2 * i], s[2 * i + 1]);
+          ctx.lineTo(s[2 * i + 2], s[2 * i + 3]);
+        }
+      }
+      ctx.strokeStyle = color;
+      ctx.stroke();
+    });
+  },
+
+  // ---------- hit testing ----------
+
+  hitTest(containerPoint) {
+    const tol = this.options.hitTolerance;
+    const px = containerPoint.x;
+    const py = containerPoint.y;
+    let best = null;
+    let bestD2 = tol * tol;
+
+    for (const path of this._paths.values()) {
+      const [minX, minY, maxX, maxY] = path.box;
+      if (px < minX - tol || px > maxX + tol || py < minY - tol || py > maxY + tol) continue;
+
+      const s = path.screen;
+      for (let i = 0; i + 3 < s.length; i += 2) {
+        const d2 = distToSegment2(px, py, s[i], s[i + 1], s[i + 2], s[i + 3]);
+        if (d2 <= bestD2) {
+          bestD2 = d2;
+          best = path;
+        }
+      }
+    }
+    return best;
+  },
+
+  _onMouseMove(e) {
+    const path = this.hitTest(e.containerPoint);
+    this._map.getContainer().style.cursor = path ? "pointer" : "";
+
+    if (path && path.properties.flight) {
+      this._tooltip.setContent(path.properties.flight).setLatLng(e.latlng);
+      this._map.openTooltip(this._tooltip);
+    } else {
+      this._map.closeTooltip(this._tooltip);
+    }
+  },
+
+  _onClick(e) {
+    const path = this.hitTest(e.containerPoint);
+    if (path) this.fire("pathclick", { path, latlng: e.latlng, originalEvent: e.originalEvent });
+  },
+});
+
+function distToSegment2(px, py, x1, y1, x2, y2) {
+  const dx = x2 - x1;
+  const dy = y2 - y1;
+  const len2 = dx * dx + dy * dy;
+  let t = len2 > 0 ? ((px - x1) * dx + (py - y1) * dy) / len2 : 0;
+  t = Math.max(0, Math.min(1, t));
+  const ex = px - (x1 + t * dx);
+  const ey = py - (y1 + t * dy);
+  return ex * ex + ey * ey;
+}
+
+L.pathCanvasLayer = (options) => new L.PathCanvasLayer(options);